@@ -0,0 +1,134 @@
+"""Audit runs over many NS exports, e.g. the twelve or more monthly exports of a
+year, parsed in parallel.
+
+Every export is read in, cleaned and its routes parsed by parse_export in a
+process of its own. A worker returns plain column arrays, with the descriptions
+and routes as categorical codes and their distinct values, so little more than
+the numbers travel back to the main process. audit_exports joins them, drops the
+transactions that overlapping exports have in common, with the same identity as
+export_merge, and totals them per month, in cents like check_amount."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from expense_report import load_expenses
+from export_merge import export_card, occurrences, transaction_cards
+from halte_parser import parse_van_naar
+from reconciliation import PRICE_CENTS_COLUMN
+
+"Processes parsing exports at once, capped by the number of exports"
+AUDIT_WORKERS = os.cpu_count() or 1
+
+"The columns that identify a transaction, see export_merge"
+IDENTITY = ['datum', 'omschrijving', 'cents', 'card', 'occurrence']
+
+
+def categorical_arrays(values):
+    """
+    Returns a column as its categorical codes and distinct values.
+
+    :param values: The column
+    :type values: Series
+    :return: tuple (codes, categories)
+    :rtype: tuple
+    """
+    values = values.astype('category')
+
+    return values.cat.codes.to_numpy(), values.cat.categories.to_numpy(dtype=object)
+
+
+def parse_export(export_path):
+    """
+    Reads in, cleans and parses the routes of one export. Runs in a worker process.
+
+    :param export_path: The path of the excel file
+    :type export_path: str
+    :return: dictionary with the path of the export, and per column (datum, cents, occurrence, card,
+        omschrijving, van_halte, naar_halte) an array; the text columns as a tuple (codes, categories)
+    :rtype: dict
+    """
+    df = load_expenses(export_path)
+    routes = parse_van_naar(df['Omschrijving'])
+    cards = transaction_cards(df, export_card(export_path))
+
+    return {'path': export_path,
+            'datum': df['Datum'].to_numpy().astype('datetime64[D]'),
+            'cents': df[PRICE_CENTS_COLUMN].to_numpy(dtype='int64'),
+            'occurrence': occurrences(df, cards).to_numpy(dtype='int32'),
+            'card': categorical_arrays(cards),
+            'omschrijving': categorical_arrays(df['Omschrijving']),
+            'van_halte': categorical_arrays(routes['van_halte']),
+            'naar_halte': categorical_arrays(routes['naar_halte'])}
+
+
+def parse_exports(export_paths, workers=AUDIT_WORKERS):
+    """
+    Parses the exports in a pool of worker processes, or in this process for a single export or worker.
+
+    :param export_paths: The paths of the excel files
+    :type export_paths: list
+    :param workers: The maximum number of worker processes
+    :type workers: int
+    :return: The results of parse_export, in the order of export_paths
+    :rtype: list
+    """
+    workers = min(workers, len(export_paths))
+    if workers <= 1:
+        return [parse_export(export_path) for export_path in export_paths]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_export, export_paths))
+
+
+def join_parsed(parsed):
+    """
+    Joins the results of parse_export into one dataframe, keeping every row.
+
+    :param parsed: The results of parse_export
+    :type parsed: list
+    :return: dataframe with the columns datum, omschrijving, cents, card, occurrence, van_halte and naar_halte
+    :rtype: dataframe
+    """
+    def categorical(column):
+        return union_categoricals([pd.Categorical.from_codes(*result[column]) for result in parsed])
+
+    return pd.DataFrame({'datum': np.concatenate([result['datum'] for result in parsed]).astype('datetime64[ns]'),
+                         'omschrijving': categorical('omschrijving'),
+                         'cents': np.concatenate([result['cents'] for result in parsed]),
+                         'card': categorical('card'),
+                         'occurrence': np.concatenate([result['occurrence'] for result in parsed]),
+                         'van_halte': categorical('van_halte'),
+                         'naar_halte': categorical('naar_halte')})
+
+
+def audit_exports(export_paths, year=None, workers=AUDIT_WORKERS):
+    """
+    Parses the exports in parallel and totals their transactions per month.
+
+    :param export_paths: The paths of the excel files
+    :type export_paths: list
+    :param year: Only count the transactions of this year
+    :type year: int
+    :param workers: The maximum number of worker processes
+    :type workers: int
+    :return: dictionary with keys per_month (dataframe with the columns rows and cents, indexed on the month as
+        YYYY-MM), per_route (Series of cents, the most expensive first), total_cents, rows (the transactions in all
+        exports) and duplicates (those that were in more than one export)
+    :rtype: dict
+    """
+    if not export_paths:
+        raise ValueError("No exports to audit")
+    df = join_parsed(parse_exports(export_paths, workers))
+    rows = len(df)
+    df = df[~df.duplicated(IDENTITY)]
+    duplicates = rows - len(df)
+    if year is not None:
+        df = df[df['datum'].dt.year == year]
+
+    per_month = df.groupby(df['datum'].dt.strftime('%Y-%m'))['cents'].agg(rows='size', cents='sum')
+    per_month.index.name = 'month'
+    per_route = df.groupby(['van_halte', 'naar_halte'], observed=True)['cents'].sum().sort_values(ascending=False)
+
+    return {'per_month': per_month, 'per_route': per_route, 'total_cents': int(df['cents'].sum()), 'rows': rows,
+            'duplicates': duplicates}
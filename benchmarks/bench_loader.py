@@ -0,0 +1,89 @@
+#! python3
+"""Compares the memory of the compact loader (read_in_df and filter_out_zero)
+with the previous loader, which read every column with default dtypes and
+copied the frame for every cleaning step, on generated NS exports.
+
+Run from the repository root: python benchmarks/bench_loader.py [--sizes 1000 100000]"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd  # noqa: E402
+import expense_report  # noqa: E402
+from bench_stages import measure  # noqa: E402
+from synthetic_export import write_export  # noqa: E402
+
+SIZES = [1000, 10000, 100000]
+
+
+def previous_loader(export_path):
+    """
+    The previous read_in_df and filter_out_zero, as the baseline.
+
+    :param export_path: The path of the excel file
+    :type export_path: str
+    :return: The cleaned dataframe containing the expenses
+    :rtype: dataframe
+    """
+    df = pd.read_excel(export_path)
+    df.drop(df.tail(1).index, inplace=True)
+    df = df[df["Prijs (incl. btw)"] != 0]
+    df = df.sort_values('Datum')
+    df.reset_index(inplace=True)
+    del df['index']
+
+    return df
+
+
+def compact_loader(export_path):
+    """
+    The current read_in_df and filter_out_zero.
+
+    :param export_path: The path of the excel file
+    :type export_path: str
+    :return: The cleaned dataframe containing the expenses
+    :rtype: dataframe
+    """
+    return expense_report.filter_out_zero(expense_report.read_in_df(export_path))
+
+
+def bench_size(rows, directory):
+    """
+    Generates an export of rows transactions and measures both loaders on it.
+
+    :param rows: The number of transactions
+    :type rows: int
+    :param directory: The directory to write the export to
+    :type directory: str
+    :return: tuples (loader, seconds, peak_bytes, frame_bytes)
+    :rtype: list
+    """
+    export_path = os.path.join(directory, f'reistransacties-{rows}.xlsx')
+    write_export(export_path, rows)
+
+    results = []
+    for name, loader in [('previous', previous_loader), ('compact', compact_loader)]:
+        df, seconds, peak_bytes = measure(loader, export_path)
+        results.append((name, seconds, peak_bytes, df.memory_usage(deep=True).sum()))
+
+    return results
+
+
+def main():
+    """Runs the benchmark for every size and prints the results"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'loader':<10} {'seconds':>9} {'peak MiB':>9} {'frame MiB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.sizes:
+            for name, seconds, peak_bytes, frame_bytes in bench_size(rows, directory):
+                print(f"{rows:>8} {name:<10} {seconds:>9.3f} {peak_bytes / 2 ** 20:>9.1f} "
+                      f"{frame_bytes / 2 ** 20:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
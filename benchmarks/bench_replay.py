@@ -0,0 +1,117 @@
+#! python3
+"""Records fill_in_basics_sogeti and loop_through_df against the local stand-in
+of Einstein in a headless Chrome once, and then replays the recorded command
+stream without a browser, so the Python side of the submission is timed without
+network latency and every replay is checked against the exact command count and
+order of the recording.
+
+Run from the repository root: python benchmarks/bench_replay.py [--rows 100] [--repeat 20]
+A saved recording can be replayed without Chrome: --recording replay.json"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import declaratie_sogeti_2 as declaratie  # noqa: E402
+import webdriver_replay  # noqa: E402
+from expense_report import calculate_amount  # noqa: E402
+from bench_submission import generate_expenses  # noqa: E402
+from standin_server import StandInServer  # noqa: E402
+from waits import WAIT_ENV_PREFIX, WAIT_SETTINGS  # noqa: E402
+
+FROM_DATE = datetime.datetime(2020, 1, 1)
+
+
+def submission(browser, df):
+    """
+    The recorded part of the run: the basics of the declaration and every expense row.
+
+    :param browser: The browser on the new declaration
+    :type browser: WebDriver
+    :param df: The dataframe containing the expenses
+    :type df: dataframe
+    :return: None
+    """
+    declaratie.fill_in_basics_sogeti(browser, FROM_DATE, calculate_amount(df))
+    declaratie.loop_through_df(df, browser, bulk=True, confirm=False)
+
+
+def record(df, recording_path):
+    """
+    Runs the submission against the stand-in in a headless Chrome and records it.
+
+    :param df: The dataframe containing the expenses
+    :type df: dataframe
+    :param recording_path: The path to write the recording to
+    :type recording_path: str
+    :return: The recording and the number of seconds the recorded run took
+    :rtype: tuple
+    """
+    server = StandInServer().start()
+    browser = declaratie.start_browser(headless=True)
+    try:
+        browser.get(server.einstein_url)
+        declaratie.check_sogeti_element(browser, interactive=False)
+        recorder = webdriver_replay.start_recording(browser)
+        start = time.perf_counter()
+        submission(browser, df)
+        seconds = time.perf_counter() - start
+
+        return webdriver_replay.save_recording(browser, recorder, recording_path), seconds
+    finally:
+        browser.quit()
+        server.stop()
+
+
+def replay(recording, df):
+    """
+    Replays the submission against the recording and checks that every recorded command was sent.
+
+    :param recording: The recording
+    :type recording: dict
+    :param df: The dataframe containing the expenses
+    :type df: dataframe
+    :return: The number of seconds the replayed run took
+    :rtype: float
+    """
+    driver, executor = webdriver_replay.replay_driver(recording)
+    start = time.perf_counter()
+    submission(driver, df)
+    seconds = time.perf_counter() - start
+    executor.assert_finished()
+
+    return seconds
+
+
+def main():
+    """Records a run, or reads in a recording, replays it and prints the results"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--recording', help="Replay this recording instead of recording a run in Chrome")
+    parser.add_argument('--output', default='replay.json', help="The path to write a new recording to")
+    args = parser.parse_args()
+
+    df = generate_expenses(args.rows)
+    if args.recording:
+        recording = webdriver_replay.load_recording(args.recording)
+    else:
+        recording, seconds = record(df, args.output)
+        print(f"recorded {len(recording['commands'])} commands in {seconds:.2f} s to {args.output}")
+
+    "A replayed wait gets the recorded response at once, so only waits that polled more than once would sleep"
+    for kind, (timeout, _) in WAIT_SETTINGS.items():
+        os.environ.setdefault(WAIT_ENV_PREFIX + kind.upper(), f'{timeout},0.001')
+
+    timings = sorted(replay(recording, df) for _ in range(args.repeat))
+    counts = webdriver_replay.command_counts(recording['commands'])
+    print(f"replayed {sum(counts.values())} commands {args.repeat} times, "
+          f"median {timings[len(timings) // 2] * 1000:.1f} ms, best {timings[0] * 1000:.1f} ms")
+    for command, count in counts.most_common():
+        print(f"{count:>8} {command}")
+
+
+if __name__ == '__main__':
+    main()
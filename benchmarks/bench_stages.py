@@ -0,0 +1,81 @@
+#! python3
+"""Times and measures the peak memory of read_in_df, filter_out_zero,
+check_amount and prepare_form_rows on their own, on generated NS exports.
+
+Run from the repository root: python benchmarks/bench_stages.py [--sizes 100 10000 1000000]"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import expense_report  # noqa: E402
+from synthetic_export import write_export  # noqa: E402
+
+SIZES = [100, 1000, 10000, 100000, 1000000]
+
+
+def measure(function, *args):
+    """
+    Calls function once and returns its result, the elapsed wall time and the peak of the traced memory.
+
+    :param function: The function to measure
+    :type function: callable
+    :return: tuple (result, seconds, peak_bytes)
+    :rtype: tuple
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # check_amount prints its verdict
+        result = function(*args)
+    seconds = time.perf_counter() - start
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, seconds, peak_bytes
+
+
+def bench_size(rows, directory):
+    """
+    Generates an export of rows transactions and measures every stage on it.
+
+    :param rows: The number of transactions
+    :type rows: int
+    :param directory: The directory to write the export to
+    :type directory: str
+    :return: tuples (stage, seconds, peak_bytes)
+    :rtype: list
+    """
+    export_path = os.path.join(directory, f'reistransacties-{rows}.xlsx')
+    amount = write_export(export_path, rows)
+
+    df_raw, read_seconds, read_peak = measure(expense_report.read_in_df, export_path)
+    df_filtered, filter_seconds, filter_peak = measure(expense_report.filter_out_zero, df_raw.copy())
+    _, check_seconds, check_peak = measure(expense_report.check_amount, df_filtered, amount)
+    _, prepare_seconds, prepare_peak = measure(expense_report.prepare_form_rows, df_filtered)
+
+    return [('read_in_df', read_seconds, read_peak),
+            ('filter_out_zero', filter_seconds, filter_peak),
+            ('check_amount', check_seconds, check_peak),
+            ('prepare_form_rows', prepare_seconds, prepare_peak)]
+
+
+def main():
+    """Runs the benchmark for every size and prints the results"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'stage':<18} {'seconds':>9} {'peak MiB':>9} {'rows/s':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.sizes:
+            for stage, seconds, peak_bytes in bench_size(rows, directory):
+                print(f"{rows:>8} {stage:<18} {seconds:>9.3f} {peak_bytes / 2 ** 20:>9.1f} {rows / seconds:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
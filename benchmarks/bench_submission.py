@@ -0,0 +1,87 @@
+#! python3
+"""Measures how many expense rows per second loop_through_df fills in, against
+the local stand-in of Einstein in a headless Chrome.
+
+Run from the repository root: python benchmarks/bench_submission.py [--sizes 10 100 1000]"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import declaratie_sogeti_2 as declaratie  # noqa: E402
+from expense_report import calculate_amount, compact_export, filter_out_zero  # noqa: E402
+from standin_server import StandInServer, filled_rows  # noqa: E402
+from synthetic_export import generate_export_df  # noqa: E402
+
+SIZES = [10, 100, 1000]
+
+
+def generate_expenses(rows):
+    """
+    Generates a cleaned dataframe with rows expenses in January 2020.
+
+    :param rows: The number of expenses
+    :type rows: int
+    :return: The dataframe containing the expenses
+    :rtype: dataframe
+    """
+    "Generate extra transactions, as the zero-price check-ins are dropped"
+    df = filter_out_zero(compact_export(generate_export_df(2 * rows + 10)))
+    df = df.head(rows)
+
+    return df
+
+
+def time_submission(server, browser, df, bulk):
+    """
+    Opens a new declaration on the stand-in and times loop_through_df.
+
+    :param server: The running stand-in server
+    :type server: StandInServer
+    :param browser: The headless browser
+    :type browser: WebDriver
+    :param df: The dataframe containing the expenses
+    :type df: dataframe
+    :param bulk: Whether to use the bulk mode of loop_through_df
+    :type bulk: bool
+    :return: The number of seconds loop_through_df took
+    :rtype: float
+    """
+    browser.get(server.einstein_url)
+    declaratie.check_sogeti_element(browser, interactive=False)
+    declaratie.fill_in_basics_sogeti(browser, datetime.datetime(2020, 1, 1), calculate_amount(df))
+
+    start = time.perf_counter()
+    declaratie.loop_through_df(df, browser, bulk=bulk, confirm=False)
+    seconds = time.perf_counter() - start
+
+    "The first OpslaanControle of the run holds every row"
+    assert filled_rows(server.submissions[-2]) == len(df)
+
+    return seconds
+
+
+def main():
+    """Runs the benchmark for every size and both modes and prints the results"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    args = parser.parse_args()
+
+    server = StandInServer().start()
+    browser = declaratie.start_browser(headless=True)
+    try:
+        print(f"{'rows':>6} {'mode':<8} {'seconds':>9} {'rows/s':>9}")
+        for size in args.sizes:
+            df = generate_expenses(size)
+            for bulk in (False, True):
+                seconds = time_submission(server, browser, df, bulk)
+                print(f"{size:>6} {'bulk' if bulk else 'per-row':<8} {seconds:>9.2f} {size / seconds:>9.1f}")
+    finally:
+        browser.quit()
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#! python3
+"""Compares the row-wise return_van_naar with the column-level parse_van_naar
+on generated expense descriptions.
+
+Run from the repository root: python benchmarks/bench_van_naar.py"""
+import os
+import random
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from halte_parser import parse_van_naar, return_van_naar  # noqa: E402
+
+SIZES = [1000, 10000, 100000]
+STATIONS = ['Utrecht Centraal', 'Amsterdam Centraal', 'Den Haag HS', 'Rotterdam Centraal', 'Schiphol Airport']
+HALTES = ['halte Utrecht Neude', 'halte Utrecht Vaartsche Rijn', 'halte Den Haag Centraal', 'halte Amsterdam Dam']
+
+
+def generate_omschrijving(size, seed=0):
+    """
+    Generates expense descriptions covering every rule of the station parser.
+
+    :param size: The number of descriptions
+    :type size: int
+    :param seed: The seed of the random generator
+    :type seed: int
+    :return: The generated descriptions
+    :rtype: Series
+    """
+    rng = random.Random(seed)
+    omschrijving = []
+    for _ in range(size):
+        kind = rng.random()
+        van, naar = rng.sample(STATIONS, 2)
+        if kind < 0.6:
+            omschrijving.append(f'Check-in/Check-uit: {van} - {naar}')
+        elif kind < 0.7:
+            omschrijving.append(f'Correctietarief: {van}')
+        elif kind < 0.9:
+            van, naar = rng.sample(HALTES, 2)
+            omschrijving.append(f'Bus {van} naar {naar}')
+        else:
+            omschrijving.append(f'Toeslag {van}')
+
+    return pd.Series(omschrijving)
+
+
+def time_call(function, *args):
+    """
+    Calls function once and returns its result and the elapsed wall time.
+
+    :param function: The function to time
+    :type function: callable
+    :return: tuple (result, seconds)
+    :rtype: tuple
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+
+    return result, seconds
+
+
+def row_wise(omschrijving):
+    """
+    Applies return_van_naar to every row, the way loop_through_df used to.
+
+    :param omschrijving: The descriptions
+    :type omschrijving: Series
+    :return: The list of (van_halte, naar_halte) tuples
+    :rtype: list
+    """
+    return [return_van_naar(value) for value in omschrijving]
+
+
+def main():
+    """Runs the benchmark for every size and prints the results"""
+    print(f"{'rows':>10} {'row-wise (s)':>14} {'vectorized (s)':>16} {'speed-up':>10}")
+    for size in SIZES:
+        omschrijving = generate_omschrijving(size)
+        expected, row_seconds = time_call(row_wise, omschrijving)
+        routes, column_seconds = time_call(parse_van_naar, omschrijving)
+
+        "Both versions must give the same stations"
+        assert expected == list(zip(routes['van_halte'], routes['naar_halte']))
+
+        print(f"{size:>10} {row_seconds:>14.4f} {column_seconds:>16.4f} {row_seconds / column_seconds:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
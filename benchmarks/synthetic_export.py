@@ -0,0 +1,82 @@
+"""Generates NS reistransacties exports for the benchmarks: check-in/check-uit
+trips, 'halte' bus trips, Correctietarief lines, zero-price check-ins and a
+trailing totals row, like the real downloads."""
+import calendar
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Kaartnummer', 'Datum', 'Omschrijving', 'Klasse', 'Prijs (incl. btw)']
+KAARTNUMMER = '3528010488672904'
+STATIONS = ['Utrecht Centraal', 'Amsterdam Centraal', 'Den Haag HS', 'Rotterdam Centraal', 'Schiphol Airport',
+            'Amersfoort Centraal', 'Eindhoven Centraal', 'Leiden Centraal']
+HALTES = ['halte Utrecht Neude', 'halte Utrecht Vaartsche Rijn', 'halte Den Haag Centraal', 'halte Amsterdam Dam']
+
+
+def generate_export_df(rows, year=2020, month_nr=1, seed=0):
+    """
+    Generates the contents of an NS export with rows transactions in one month, plus the totals row.
+
+    :param rows: The number of transactions
+    :type rows: int
+    :param year: The year of the transactions
+    :type year: int
+    :param month_nr: The month of the transactions
+    :type month_nr: int
+    :param seed: The seed of the random generator
+    :type seed: int
+    :return: The export as the NS webpage offers it, before filter_out_zero
+    :rtype: dataframe
+    """
+    rng = np.random.default_rng(seed)
+    days = np.sort(rng.integers(1, calendar.monthrange(year, month_nr)[1] + 1, rows))
+    datum = np.char.add(np.char.zfill(days.astype(str), 2), f'-{str(month_nr).zfill(2)}-{year}')
+
+    stations = np.array(STATIONS)
+    haltes = np.array(HALTES)
+    van = stations[rng.integers(0, len(stations), rows)]
+    naar = stations[rng.integers(0, len(stations), rows)]
+    van_bus = haltes[rng.integers(0, len(haltes), rows)]
+    naar_bus = haltes[rng.integers(0, len(haltes), rows)]
+    kind = rng.random(rows)
+    omschrijving = np.where(
+        kind < 0.6, np.char.add('Check-in/Check-uit: ', np.char.add(np.char.add(van, ' - '), naar)),
+        np.where(kind < 0.7, np.char.add('Correctietarief: ', van),
+                 np.where(kind < 0.85, np.char.add(np.char.add(np.char.add('Bus ', van_bus), ' naar '), naar_bus),
+                          np.char.add('Check-in: ', van))))
+
+    "Check-ins without a check-out cost nothing and are filtered out"
+    prijs = np.where(kind < 0.85, np.round(rng.uniform(1, 30, rows), 2), 0.0)
+
+    df = pd.DataFrame({
+        'Kaartnummer': KAARTNUMMER,
+        'Datum': datum,
+        'Omschrijving': omschrijving,
+        'Klasse': np.where(rng.random(rows) < 0.9, '2e klas', '1e klas'),
+        'Prijs (incl. btw)': prijs,
+    }, columns=COLUMNS)
+    totals = pd.DataFrame([{'Omschrijving': 'Totaal', 'Prijs (incl. btw)': round(prijs.sum(), 2)}], columns=COLUMNS)
+
+    return pd.concat([df, totals], ignore_index=True)
+
+
+def write_export(path, rows, year=2020, month_nr=1, seed=0):
+    """
+    Writes a generated NS export to an excel file.
+
+    :param path: The path of the excel file, .xlsx
+    :type path: str
+    :param rows: The number of transactions
+    :type rows: int
+    :param year: The year of the transactions
+    :type year: int
+    :param month_nr: The month of the transactions
+    :type month_nr: int
+    :param seed: The seed of the random generator
+    :type seed: int
+    :return: The expected total amount after filter_out_zero
+    :rtype: float
+    """
+    df = generate_export_df(rows, year, month_nr, seed)
+    df.to_excel(path, index=False)
+
+    return df['Prijs (incl. btw)'].iloc[-1]
@@ -0,0 +1,365 @@
+#! python3
+"""Command line of the expense automation.
+
+  validate  reads in NS exports and checks them against the amount, without a browser
+  plan      prints or writes the rows that would be filled in on the Einstein form
+  submit    submits one or more periods, given as YYYY-MM=amount[=export_path[,export_path...]]
+  stream    submits a period row by row from an NS export or an OV-chipkaart CSV
+  ingest    writes NS exports to the local store of past transactions
+  report    prints the stored totals per month and the most expensive routes
+  audit     parses many NS exports in parallel and prints the totals per month
+
+Several exports of a period, e.g. of more than one card, are merged without
+their duplicate transactions.
+
+Without a command the program asks for the year, month and amount like before.
+Selenium is only imported by the commands that open a browser."""
+import argparse
+import contextlib
+import csv
+import os
+import sys
+from instrumentation import TRACE_ENV, enable_tracing, finish_tracing
+
+BROWSER_COMMANDS = ('submit', 'interactive', 'stream')
+
+
+def positive_int(value):
+    """
+    Argument type of a count that must be at least 1.
+
+    :param value: The command line value
+    :type value: str
+    :return: The count
+    :rtype: int
+    """
+    count = int(value)
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {count}")
+
+    return count
+
+
+def run_validate(args):
+    """
+    Reads in the exports, or the month from the store, and checks the amount.
+
+    :param args: The parsed arguments
+    :type args: Namespace
+    :return: The exit code, 1 when the amounts don't match
+    :rtype: int
+    """
+    import expense_report
+
+    if args.month:
+        import expense_store
+
+        year, month_nr = (int(value) for value in args.month.split('-'))
+        with contextlib.closing(expense_store.connect(args.store or expense_store.STORE_PATH)) as connection:
+            df = expense_store.load_month(connection, year, month_nr)
+        print(f"{len(df)} expense rows stored for {args.month}")
+    elif args.exports:
+        df = expense_report.load_exports(args.exports)
+        print(f"{len(df)} expense rows in {', '.join(args.exports)}")
+    else:
+        print("Give the exports to check, or --month to check the stored transactions")
+        return 2
+    try:
+        expense_report.check_amount(df, args.amount, interactive=False)
+    except ValueError:
+        return 1
+
+    return 0
+
+
+def run_plan(args):
+    """
+    Compiles the exports into the submission plan and prints it, or writes it as CSV.
+
+    :param args: The parsed arguments
+    :type args: Namespace
+    :return: The exit code
+    :rtype: int
+    """
+    import expense_report
+    from submission_plan import FormRow
+
+    plan = expense_report.prepare_form_rows(expense_report.load_exports(args.exports))
+    if args.output:
+        with open(args.output, 'w', newline='') as plan_file:
+            writer = csv.writer(plan_file)
+            writer.writerow(FormRow._fields)
+            writer.writerows(plan)
+        print(f"{len(plan)} rows written to {args.output}")
+    else:
+        for form_row in plan:
+            print('  '.join(str(value) for value in form_row))
+
+    return 0
+
+
+def run_stream(args):
+    """
+    Streams a source through the pipeline into the Einstein form, or into a CSV file for a dry run.
+
+    :param args: The parsed arguments
+    :type args: Namespace
+    :return: The exit code, 1 when a dry run does not add up to the amount
+    :rtype: int
+    """
+    import collections
+    import pipeline
+    from expense_report import parse_period_arg
+    from reconciliation import amount_to_cents, format_cents
+
+    year, month_nr, amount, _ = parse_period_arg(args.period)
+    if args.format == 'ovchipkaart':
+        source = pipeline.ovchipkaart_source(args.source)
+        window = pipeline.OV_REORDER_ROWS if args.reorder is None else args.reorder
+    else:
+        source = pipeline.ns_export_source(args.source)
+        window = pipeline.REORDER_ROWS if args.reorder is None else args.reorder
+
+    try:
+        if args.csv:
+            totals = collections.Counter()
+            written = pipeline.csv_sink(pipeline.form_rows(source, totals, window=window), args.csv)
+            print(f"{written} rows written to {args.csv}, together {format_cents(totals['cents'])}")
+            return 0 if totals['cents'] == amount_to_cents(amount) else 1
+
+        import declaratie_sogeti_2 as declaratie
+
+        declaratie.stream_period(year, month_nr, amount, source, window)
+    except ValueError as error:  # A source out of date order, a line that can't be read or a total that differs
+        print(f"Could not stream {args.source}: {error}")
+        return 1
+
+    return 0
+
+
+def run_ingest(args):
+    """
+    Writes the exports to the store.
+
+    :param args: The parsed arguments
+    :type args: Namespace
+    :return: The exit code
+    :rtype: int
+    """
+    import expense_report
+    import expense_store
+    from export_merge import export_card
+
+    with contextlib.closing(expense_store.connect(args.store or expense_store.STORE_PATH)) as connection:
+        for export_path in args.exports:
+            added = expense_store.ingest(connection, expense_report.load_expenses(export_path), export_card(export_path))
+            print(f"{added} new transactions from {export_path}")
+
+    return 0
+
+
+def run_report(args):
+    """
+    Prints the stored totals per month and card, and the most expensive routes of the year.
+
+    :param args: The parsed arguments
+    :type args: Namespace
+    :return: The exit code
+    :rtype: int
+    """
+    import expense_store
+    from reconciliation import format_cents
+
+    with contextlib.closing(expense_store.connect(args.store or expense_store.STORE_PATH)) as connection:
+        print(f"{'month':<8} {'card':<18} {'rows':>6} {'amount':>10}")
+        for month, card, cents, rows in expense_store.month_totals(connection, args.year):
+            print(f"{month:<8} {card:<18} {rows:>6} {format_cents(cents):>10}")
+        if args.year and args.routes:
+            print("---------------------------------------------------------------")
+            for van_halte, naar_halte, cents, rows in expense_store.top_routes(connection, args.year, args.routes):
+                print(f"{format_cents(cents):>10} {rows:>5}x  {van_halte} - {naar_halte}")
+
+    return 0
+
+
+def run_audit(args):
+    """
+    Parses the exports in worker processes and prints the totals per month, compared with the declared amounts.
+
+    :param args: The parsed arguments
+    :type args: Namespace
+    :return: The exit code, 1 when a declared amount doesn't match
+    :rtype: int
+    """
+    import audit
+    from reconciliation import amount_to_cents, format_cents
+
+    declared = {}
+    for declared_arg in args.declared:
+        month, amount = declared_arg.split('=')
+        declared[month] = amount_to_cents(float(amount))
+
+    result = audit.audit_exports(args.exports, args.year, args.workers)
+    print(f"{result['rows']} transactions in {len(args.exports)} exports, {result['duplicates']} in more than one")
+    print(f"{'month':<8} {'rows':>6} {'amount':>10} {'declared':>10}")
+    mismatches = 0
+    for month, rows, cents in result['per_month'].itertuples():
+        declared_cents = declared.pop(month, None)
+        mark = ''
+        if declared_cents is not None and declared_cents != cents:
+            mismatches += 1
+            mark = f'  difference {format_cents(cents - declared_cents)}'
+        declared_text = '' if declared_cents is None else format_cents(declared_cents)
+        print(f"{month:<8} {rows:>6} {format_cents(cents):>10} {declared_text:>10}{mark}")
+    for month, declared_cents in sorted(declared.items()):
+        mismatches += 1
+        print(f"{month:<8} {0:>6} {format_cents(0):>10} {format_cents(declared_cents):>10}  no transactions")
+    print(f"{'total':<8} {result['per_month']['rows'].sum():>6} {format_cents(result['total_cents']):>10}")
+    if args.routes:
+        print("---------------------------------------------------------------")
+        for (van_halte, naar_halte), cents in result['per_route'].head(args.routes).items():
+            print(f"{format_cents(int(cents)):>10}  {van_halte} - {naar_halte}")
+
+    return 1 if mismatches else 0
+
+
+def run_submit(args):
+    """
+    Submits the declarations of the given periods in a single browser session.
+
+    :param args: The parsed arguments
+    :type args: Namespace
+    :return: The exit code, 1 when a period is refused before its declarations are started
+    :rtype: int
+    """
+    import declaratie_sogeti_2 as declaratie
+    from expense_report import parse_period_arg
+
+    periods = [parse_period_arg(period_arg) for period_arg in args.periods]
+    try:
+        if args.resume:
+            year, month_nr, amount, export_paths = periods[0]
+            declaratie.submit_period(year, month_nr, amount, export_paths, resume=True, bulk=not args.per_row)
+        else:
+            declaratie.run_batch(periods, fetch=args.fetch, max_rows=args.max_rows, bulk=not args.per_row)
+    except ValueError as error:  # A period that can't be split, or a journal that doesn't match the export
+        print(f"Could not submit: {error}")
+        return 1
+
+    return 0
+
+
+def run_interactive(args):
+    """
+    Asks for the year, month and amount and submits that period.
+
+    :param args: The parsed arguments
+    :type args: Namespace
+    :return: The exit code
+    :rtype: int
+    """
+    import declaratie_sogeti_2 as declaratie
+
+    declaratie.main(resume=args.resume)
+
+    return 0
+
+
+def build_parser():
+    """
+    Returns the argument parser.
+
+    :return: The parser
+    :rtype: ArgumentParser
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trace', default=os.environ.get(TRACE_ENV),
+                        help=f'write a JSON trace of the stages to this file (default: ${TRACE_ENV})')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue the draft declaration of a period from its journal: the period that is '
+                             'asked for, or the single period of submit')
+    parser.set_defaults(command='interactive', run=run_interactive)
+    subparsers = parser.add_subparsers(title='commands')
+
+    validate = subparsers.add_parser('validate', help='check NS exports against the amount')
+    validate.add_argument('amount', type=float, help='the amount to check the exports against')
+    validate.add_argument('exports', nargs='*', help='the NS exports (reistransacties-*.xls)')
+    validate.add_argument('--month', help='check the stored transactions of this month (YYYY-MM) instead')
+    validate.add_argument('--store', help='the SQLite store (default: ~/.expense_automation/expenses.sqlite)')
+    validate.set_defaults(command='validate', run=run_validate)
+
+    plan = subparsers.add_parser('plan', help='show the rows that would be filled in')
+    plan.add_argument('exports', nargs='+', help='the NS exports (reistransacties-*.xls)')
+    plan.add_argument('--output', help='write the rows to this CSV file instead')
+    plan.set_defaults(command='plan', run=run_plan)
+
+    submit = subparsers.add_parser('submit', help='submit the declarations of one or more periods')
+    submit.add_argument('periods', nargs='+', metavar='YYYY-MM=amount[=export_path[,export_path...]]',
+                        help='the latest export in the download directory is used when export_path is left out')
+    submit.add_argument('--fetch', action='store_true',
+                        help='fetch the exports that are not given from NS over HTTP after one login')
+    submit.add_argument('--max-rows', type=positive_int,
+                        help='split a period into declarations of at most this many rows')
+    submit.add_argument('--per-row', action='store_true',
+                        help='fill in the rows with keystrokes one at a time instead of batched scripts')
+    submit.set_defaults(command='submit', run=run_submit)
+
+    stream = subparsers.add_parser('stream', help='submit a period row by row as the source is read')
+    stream.add_argument('period', metavar='YYYY-MM=amount')
+    stream.add_argument('source', help='the NS export or OV-chipkaart CSV')
+    stream.add_argument('--format', choices=['ns', 'ovchipkaart'], default='ns', help='the kind of source')
+    stream.add_argument('--csv', help='dry run: write the rows to this CSV file instead of the form')
+    stream.add_argument('--reorder', type=int,
+                        help='rows to hold back to sort a source that is not in date order '
+                             '(default: 0 for an NS export, 1000 for an OV-chipkaart CSV)')
+    stream.set_defaults(command='stream', run=run_stream)
+
+    ingest = subparsers.add_parser('ingest', help='write NS exports to the store of past transactions')
+    ingest.add_argument('exports', nargs='+', help='the NS exports (reistransacties-*.xls)')
+    ingest.add_argument('--store', help='the SQLite store (default: ~/.expense_automation/expenses.sqlite)')
+    ingest.set_defaults(command='ingest', run=run_ingest)
+
+    report = subparsers.add_parser('report', help='print the stored totals per month and the costliest routes')
+    report.add_argument('--year', type=int, help='only report this year')
+    report.add_argument('--routes', type=int, default=10, help='number of routes to print for --year')
+    report.add_argument('--store', help='the SQLite store (default: ~/.expense_automation/expenses.sqlite)')
+    report.set_defaults(command='report', run=run_report)
+
+    audit = subparsers.add_parser('audit', help='parse many NS exports in parallel and print the totals per month')
+    audit.add_argument('exports', nargs='+', help='the NS exports (reistransacties-*.xls)')
+    audit.add_argument('--year', type=int, help='only count the transactions of this year')
+    audit.add_argument('--declared', nargs='*', default=[], metavar='YYYY-MM=amount',
+                       help='the declared amounts to compare the months with')
+    audit.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help='the number of processes that parse exports')
+    audit.add_argument('--routes', type=int, default=0, help='number of costliest routes to print')
+    audit.set_defaults(command='audit', run=run_audit)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    This is the main function
+
+    :param argv: The command line arguments, sys.argv[1:] when None
+    :type argv: list
+    :return: The exit code
+    :rtype: int
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'submit' and args.resume and len(args.periods) > 1:
+        parser.error('--resume takes a single period')
+    if args.command == 'submit' and args.resume and args.max_rows:
+        parser.error('--resume continues a single declaration and cannot be combined with --max-rows')
+
+    enable_tracing(args.trace, webdriver_hooks=args.command in BROWSER_COMMANDS and not getattr(args, 'csv', None))
+    try:
+        return args.run(args)
+    finally:
+        finish_tracing()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,612 +1,757 @@
 #! python3
 """This program loops through public transport expenses and fills in
-the online form on Einstein.sogeti.nl"""
-import calendar
-import datetime
-import re
+the online form on Einstein.sogeti.nl
+
+The browser part of the program, run through cli.py. The period input and the
+checks of the expense report live in expense_report."""
+import collections
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.action_chains import ActionChains
-import glob
-import pandas as pd
 from selenium.webdriver.support.ui import Select
-from selenium.common.exceptions import NoSuchElementException
-
-
-def main():
-    """This is the main function"""
-
-    def input_user_year():
-        """
-        Lets user input year, checks if input is a type int and returns it.
-
-        :return: The value of the input year
-        :rtype: int
-        """
-
-        year = ''
-        while type(year) != int:
-            try:
-                year = input('Fill in expense year: ')
-                year = int(year)
-            except ValueError:
-                print("Please fill in an integer")
-
-        return year
-
-    def input_user_month():
-        """
-        Lets user input month, checks if input is a type int and between 0 and 13. Then returns it.
-
-        :return: The value of the input month
-        :rtype: int
-        """
-
-        month_nr = ''
-        within_range = False
-        while type(month_nr) != int or not within_range:
-            try:
-                month_nr = input('Fill in expense month (between 0 and 13): ')
-                month_nr = int(month_nr)
-                within_range = 0 < month_nr < 13
-            except ValueError:
-                print("Please fill in an integer")
-
-        return month_nr
-
-    def input_user_amount():
-        """
-        Lets user input amount, checks if input is a type float and returns it.
-
-        :return: The value of the input amount
-        :rtype: float
-        """
-
-        amount = ''
-        while type(amount) != float:
-            try:
-                amount  = input('Fill in expense amount: ')
-                amount = float(amount)
-            except ValueError:
-                print("Please fill in a number")
-
-        return amount
-
-    def define_period(year, month_nr):
-        """
-        Takes in year and month and returns first and last date.
-
-        :param year: The year value
-        :type year: int
-        :param month_nr: The month value
-        :type month_nr: int
-        :return: tuple (from_date, until_date)
-            WHERE
-            datetime from_date is the first date of the period
-            datetime until_date is the last date of the period
-        """
-
-        month_range = calendar.monthrange(year, month_nr)
-        first_day = 1
-        last_day = month_range[1]
-        from_date = datetime.datetime(year, month_nr, first_day)
-        until_date = datetime.datetime(year, month_nr, last_day)
-
-        return from_date, until_date
-
-    def string_period(from_date, until_date):
-        """
-        Turns datetime objects into string objects to fill in on NS webpage.
-
-        :param from_date: from_date: The first date of the period
-        :type from_date: datetime
-        :param until_date: The last date of the period
-        :type until_date: datetime
-        :return: A dictionary containing the string-date values to fill in on NS webpage.
-        :rtype: dict
-        """
-        date_dict_str = dict()
-        date_dict_str['from_day'] = str(from_date.day).zfill(2)
-        date_dict_str['from_month'] = str(from_date.month).zfill(2)
-        date_dict_str['from_year'] = str(from_date.year).zfill(4)
-
-        date_dict_str['until_day'] = str(until_date.day).zfill(2)
-        date_dict_str['until_month'] = str(until_date.month).zfill(2)
-        date_dict_str['until_year'] = str(until_date.year).zfill(4)
-
-        return date_dict_str
-
-    def login_ns_webpage():
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from expense_report import input_user_year, input_user_month, input_user_amount, define_period, string_period, \
+    load_exports, check_amount, prepare_form_rows
+from download_watcher import DOWNLOAD_DIR, latest_export
+from reconciliation import amount_to_cents, chunk_amounts, format_cents
+from pipeline import REORDER_ROWS, form_rows
+from submission_plan import split_chunks
+from waits import wait_for_download, wait_for_element, wait_for_iframe, wait_for_row_count
+from instrumentation import trace_row, trace_stage, traced
+from einstein_form import ROW_DATUM_SELECTOR, EinsteinForm, add_rows, fill_rows, toggle_checkboxes
+from journal import CHECKPOINT_ROWS, chunk_journals, confirm_rows, finish_declaration, first_unconfirmed, \
+    journal_path, read_journal, start_declaration
+
+"The base URLs can be pointed at another server, e.g. standin_server, with environment variables"
+EINSTEIN_URL = os.environ.get('EINSTEIN_URL', 'https://einstein.sogeti.nl/')
+NS_LOGIN_URL = os.environ.get('NS_LOGIN_URL', 'https://www.ns.nl/mijnnszakelijk/login?0')
+
+
+def start_browser(headless=False, profile_dir=None):
+    """
+    Starts a Chrome browser that downloads to DOWNLOAD_DIR.
+
+    :param headless: Whether to start Chrome without a window
+    :type headless: bool
+    :param profile_dir: Chrome user data directory to use, e.g. one where the user is already logged in
+    :type profile_dir: str
+    :return: The started browser
+    :rtype: WebDriver
+    """
+    options = webdriver.ChromeOptions()
+    options.add_experimental_option('prefs', {'download.default_directory': DOWNLOAD_DIR,
+                                              'download.prompt_for_download': False})
+    if headless:
+        options.add_argument('--headless')
+        options.add_argument('--window-size=1920,1080')
+    if profile_dir:
+        options.add_argument(f'--user-data-dir={profile_dir}')
+    browser = webdriver.Chrome(options=options)
+
+    return browser
+
+
+@traced
+def login_ns_webpage():
+    """
+    Opens browser and aks user to login to NS webpage.
+
+    :return: the webbrowser where user is logged in
+    :rtype: WebDriver
+    """
+
+    # Open browser and go to ns.nl login page
+    os.chdir(DOWNLOAD_DIR)
+    browser_ns = start_browser()
+    browser_ns.get(NS_LOGIN_URL)
+
+    "Print instruction message for user, check_ns_element waits until the user is logged in"
+    print("---------------------------------------------------------------\n"
+          "Please log in to NS webpage using your credentials")
+
+    return browser_ns
+
+
+@traced
+def check_ns_element(browser_ns, interactive=True):
+    """
+    Waits until element "gemaakte reizen" is found and clicks it.
+
+    :param browser_ns: The browser where the user is supposed to be logged in.
+    :param interactive: Whether to ask the user to log in when the element does not appear in time, instead of raising
+    :type interactive: bool
+    :return: None
+    """
+
+    "Wait for 'gemaakte reizen' and click it"
+    gemaakte_reizen = None
+    while not gemaakte_reizen:
+        try:
+            gemaakte_reizen = wait_for_element(browser_ns, By.XPATH, '//*[@id="menuitem.label.hybristravelhistory"]',
+                                               clickable=True, kind='login')
+            gemaakte_reizen.click()
+        except TimeoutException:
+            if not interactive:
+                raise
+            print("---------------------------------------------------------------\n"
+                  "Dit not find 'Gemaakte reizen'\n"
+                  "Please make sure you are logged in to the NS webpage and see the 'Gemaakte Reizen' element\n"
+                  "Then press Enter")
+            os.system('pause')
+
+
+@traced
+def download_excel_file(date_dict_str, browser_ns):
+    """
+    Takes in browser and dictionary containing date strings and downloads excel file.
+
+    :param date_dict_str: A dictionary containing the dates to fill in on ns webpage in string format
+    :type date_dict_str: dict
+    :param browser_ns: The browser object where the user is logge in to NS webpage
+    :type browser_ns: WebDriver
+    :return: The path of the downloaded excel file
+    :rtype: str
+    """
+
+    "Get string values to fill in on NS webpage"
+    from_day = wait_for_element(browser_ns, By.XPATH, '//*[@id="dayField"]', clickable=True)
+    from_day.clear()
+    from_day.send_keys(date_dict_str['from_day'])
+    from_month = browser_ns.find_element_by_xpath('//*[@id="monthField"]')
+    from_month.clear()
+    from_month.send_keys(date_dict_str['from_month'])
+    from_year = browser_ns.find_element_by_xpath('//*[@id="yearField"]')
+    from_year.clear()
+    from_year.send_keys(date_dict_str['from_year'])
+    actionchains = ActionChains(browser_ns)
+    actionchains.send_keys(Keys.TAB)
+    actionchains.send_keys(Keys.TAB)
+    actionchains.send_keys(date_dict_str['until_day'])
+    actionchains.send_keys(date_dict_str['until_month'])
+    actionchains.send_keys(date_dict_str['until_year'])
+    actionchains.perform()
+
+    "Click the Zoeken button"
+    button_zoeken = wait_for_element(browser_ns, By.XPATH, '/ html / body / main / div / div / div / div / div / div[2] / div[2] / div[1] / form / p / a[1] / span', clickable=True)
+    button_zoeken.click()
+
+    "Download the excel file"
+    started = time.time()
+    button_download = wait_for_element(browser_ns, By.CSS_SELECTOR, '#ns-app > div.col-3b > div.title.box > ul > li > a',
+                                       clickable=True)
+    button_download.click()
+
+    "Inform user to wait until download is finished"
+    print("---------------------------------------------------------------\n"
+          "Please wait until download is finished")
+
+    "Wait until download is finished"
+    export_path = wait_for_download(DOWNLOAD_DIR, started)
+
+    "Close NS browser"
+    browser_ns.close()
+
+    return export_path
+
+
+@traced
+def fetch_expenses(date_dict_str, export_paths=None):
+    """
+    NS stage of a run: gets the export of the period and reads it in. It only needs the period, so it runs in a
+    worker thread while the user logs in to Sogeti.
+
+    :param date_dict_str: A dictionary containing the dates to fill in on ns webpage in string format
+    :type date_dict_str: dict
+    :param export_paths: The paths of the excel files, the latest export is used when None
+    :type export_paths: list
+    :return: The cleaned dataframe containing the expenses
+    :rtype: dataframe
+    """
+    if export_paths is None:
+        # browser_ns = login_ns_webpage()
+        # check_ns_element(browser_ns, interactive=False)
+        # export_path = download_excel_file(date_dict_str, browser_ns)
+        with trace_stage('latest_export'):
+            export_path = latest_export(DOWNLOAD_DIR)
+        # export_path = 'C:\\Users\\jniens\\Downloads\\reistransacties-3528010488672904 (16).xls'
+        export_paths = [export_path]
+
+    return load_exports(export_paths)
+
+
+@traced
+def fetch_batch_expenses(periods, fetch=False):
+    """
+    NS stage of a batch: reads in the export of every period. When fetch is set, the exports that are not given are
+    requested over HTTP with the cookies of a single NS login instead of the latest export being used.
+
+    :param periods: tuples (year, month_nr, amount, export_paths)
+    :type periods: list
+    :param fetch: Whether to fetch the missing exports from NS
+    :type fetch: bool
+    :return: The cleaned dataframes containing the expenses, in the order of periods
+    :rtype: list
+    """
+    period_exports = [export_paths for year, month_nr, amount, export_paths in periods]
+    missing = [position for position, export_paths in enumerate(period_exports) if export_paths is None]
+    if fetch and missing:
+        "Imported here, as requests is only needed to fetch exports"
+        from ns_export import fetch_exports, session_from_browser
+
+        browser_ns = login_ns_webpage()
+        check_ns_element(browser_ns, interactive=False)
+        session = session_from_browser(browser_ns)
+        browser_ns.close()
+        fetched = fetch_exports(session, [define_period(*periods[position][:2]) for position in missing])
+        for position, export_path in zip(missing, fetched):
+            period_exports[position] = [export_path]
+
+    return [fetch_expenses(string_period(*define_period(year, month_nr)), export_paths)
+            for (year, month_nr, amount, _), export_paths in zip(periods, period_exports)]
+
+
+@traced
+def login_sogeti_webpage():
+    """
+   Opens browser and aks user to login to Sogeti webpage.
+
+    :return: the webbrowser where user is logged in
+    :rtype: WebDriver
+    """
+
+    # Open browser and go to ns.nl login page
+    os.chdir(DOWNLOAD_DIR)
+    browser_sogeti = start_browser()
+    browser_sogeti.get(EINSTEIN_URL)
+
+    "Print instruction message for user, check_sogeti_element waits until the user is logged in"
+    print("---------------------------------------------------------------\n"
+          "Please log in to Sogeti webpage using your credentials")
+
+    return browser_sogeti
+
+
+@traced
+def check_sogeti_element(browser_sogeti, interactive=True):
+    """
+    Waits until element "Mijn Sogeti" is found and clicks it.
+
+    :param browser_sogeti: The browser where the user is supposed to be logged in.
+    :type browser_sogeti: WebDriver
+    :param interactive: Whether to ask the user to log in when the element does not appear in time, instead of raising
+    :type interactive: bool
+    :return: None
+    """
+
+    "Wait for 'Mijn Sogeti' and click it"
+    mijn_sogeti = None
+    while not mijn_sogeti:
+        try:
+            mijn_sogeti = wait_for_element(browser_sogeti, By.XPATH, '//*[@id="block-menu-block-2"]/div/div/ul/li[2]/a',
+                                           clickable=True, kind='login')
+            mijn_sogeti.click()
+        except TimeoutException:
+            if not interactive:
+                raise
+            print("---------------------------------------------------------------\n"
+                  "Dit not find 'Gemaakte reizen'\n"
+                  "Please make sure you are logged in to the Sogeti webpage and see the 'Mijn Sogeti' element\n"
+                  "Then press Enter")
+            os.system('pause')
+
+
+def open_mijn_declaratie(browser_sogeti):
+    """
+    Leaves the iframe of a previous declaration, if any, and clicks "mijnDeclaratie".
+
+    :param browser_sogeti: The webbrowser where user is logged in to Sogeti webpage.
+    :type browser_sogeti: WebDriver
+    :return: None
+    """
+    browser_sogeti.switch_to.default_content()
+    wait_for_element(browser_sogeti, By.XPATH, '//*[@id="block-menu-block-5"]/div/div/ul/li[5]/ul/li[1]/a',
+                     clickable=True).click()
+
+
+@traced
+def fill_in_basics_sogeti(browser_sogeti, from_date, input_amount, journal=None, reference_suffix=''):
+    """
+    Reads in first date and amount, opens browser and fills in the expenses basics (including amount).
+
+    :param browser_sogeti: The webbrowser where user is logged in to Sogeti webpage.
+    :type browser_sogeti: WebDriver
+    :param from_date: first date of the period
+    :type from_date: datetime
+    :param input_amount: The inputted amount of the user
+    :type input_amount: float
+    :param journal: The path of the journal to record the new declaration in, if any
+    :type journal: str
+    :param reference_suffix: Text to append to 'Mijn referentie', e.g. the number of the chunk
+    :type reference_suffix: str
+    :return: The driver object to be used to fill in the expenses row by row
+    :rtype: WebDriver
+    """
+
+    month_nr = from_date.month
+    year = from_date.year
+    month_and_year = from_date.strftime('%B %Y')
+    mijn_referentie = f'Expenses for {month_and_year}{reference_suffix}'
+    input_amount = str(input_amount)
+
+    # mijnDeclaratie
+    open_mijn_declaratie(browser_sogeti)
+
+    # Wait for the iFrame on fill in page and switch to it
+    wait_for_iframe(browser_sogeti, '//*[@id="node-34"]/div/div/div/div/iframe')
+
+    # dropdown Reiskosten YP
+    dropdown = Select(wait_for_element(browser_sogeti, By.XPATH, '/html/body/form/table/tbody/tr[4]/td/select',
+                                       clickable=True))
+    dropdown.select_by_visible_text('Reiskosten YP')
+
+    # Press "Verder"
+    browser_sogeti.find_element_by_xpath('//*[@id="verderButton"]').click()
+
+    #Mijn referentie
+    txt_box_ref = wait_for_element(browser_sogeti, By.XPATH, '/html/body/form/table/tbody/tr[8]/td[2]/input',
+                                   clickable=True)
+    txt_box_ref.send_keys(mijn_referentie)
+
+    #Bedrag
+    txt_box_amount = browser_sogeti.find_element_by_xpath('/html/body/form/table/tbody/tr[10]/td[2]/input')
+    txt_box_amount.send_keys(input_amount)
+
+    # Click "vervolg declaratie
+    browser_sogeti.find_element_by_xpath('//*[@id="bvzm"]').click()
+
+    # # Change iframe
+    # frame = browser.find_element_by_xpath('//*[@id="node-34"]/div/div/div/div/iframe')
+    # browser.switch_to.frame(frame)
+
+    # Fill in month nr
+    txt_box_monthnr = wait_for_element(browser_sogeti, By.XPATH, '//*[@id="decHeadings[0].decHeadingsValue"]',
+                                       clickable=True)
+    txt_box_monthnr.send_keys(month_nr)
+    txt_box_monthnr.send_keys(Keys.TAB)
+    actionchains = ActionChains(browser_sogeti)
+    actionchains.send_keys(year)
+    actionchains.send_keys(Keys.TAB)
+    actionchains.send_keys(2)
+    actionchains.perform()
+
+    if journal:
+        start_declaration(journal, mijn_referentie)
+
+    return browser_sogeti
+
+
+@traced
+def open_draft_sogeti(browser_sogeti, mijn_referentie):
+    """
+    Opens the saved draft declaration with the given reference from "mijnDeclaratie".
+
+    :param browser_sogeti: The webbrowser where user is logged in to Sogeti webpage.
+    :type browser_sogeti: WebDriver
+    :param mijn_referentie: The 'Mijn referentie' of the declaration
+    :type mijn_referentie: str
+    :return: The driver object to be used to fill in the expenses row by row
+    :rtype: WebDriver
+    """
+    open_mijn_declaratie(browser_sogeti)
+    wait_for_iframe(browser_sogeti, '//*[@id="node-34"]/div/div/div/div/iframe')
+    wait_for_element(browser_sogeti, By.PARTIAL_LINK_TEXT, mijn_referentie, clickable=True).click()
+    wait_for_element(browser_sogeti, By.CSS_SELECTOR, ROW_DATUM_SELECTOR)
+
+    return browser_sogeti
+
+
+@traced
+def loop_through_df(df, browser_sogeti, bulk=True, confirm=True, journal=None, start_row=0):
+    """
+    Fills in the expenses on the webpage, either all rows at once with batched scripts or row by row with
+    keystrokes.
+
+    :param df: The dataframe containing the expenses
+    :type df: dataframe
+    :param browser_sogeti: The driver object to be used to fill in the expenses row by row
+    :type browser_sogeti: WebDriver
+    :param bulk: Whether to fill in all rows with batched scripts instead of keystrokes per row
+    :type bulk: bool
+    :param confirm: Whether to pause for the user before unselecting all rows
+    :type confirm: bool
+    :param journal: The path of the journal to record the saved rows in, if any
+    :type journal: str
+    :param start_row: The index of the first row to fill in, the rows before it are already saved on the form
+    :type start_row: int
+    :return: None
+    """
+
+    def generate_element():
         """
-        Opens browser and aks user to login to NS webpage.
+        Generates browser element based on string name, waiting for the row to be added.
 
-        :return: the webbrowser where user is logged in
-        :rtype: WebDriver
+        :return: The element to fill in the first value (factuurdatum) of the expense row.
+        :rtype: WebElement
         """
 
-        # Open browser and go to ns.nl login page
-        os.chdir('C:\\Users\\jniens\\Downloads')
-        browser_ns = webdriver.Chrome()
-        browser_ns.get('https://www.ns.nl/mijnnszakelijk/login?0')
-
-        "Print instruction message for user"
-        print("---------------------------------------------------------------\n"
-              "Please log in to NS webpage using your credentials")
+        element = wait_for_element(browser_sogeti, By.NAME, element_name, kind='rows')
 
-        "Pause the program to go to let user log in and navigate to fill in page"
-        os.system('pause')
+        return element
 
-        return browser_ns
-
-    def check_ns_element(browser_ns):
-        """
-        Checks if element "gemaakte reizen" is found and clicks it.
-
-        :param browser_ns: The browser where the user is supposed to be logged in.
-        :return: None
+    def fill_in_values():
         """
+        Fills in on values in in online form.
 
-        "Try to find 'gemaakte reizen' and click it"
-        gemaakte_reizen = None
-        while not gemaakte_reizen:
-            try:
-                gemaakte_reizen = browser_ns.find_element_by_xpath('//*[@id="menuitem.label.hybristravelhistory"]')
-                gemaakte_reizen.click()
-            except NoSuchElementException:
-                print("---------------------------------------------------------------\n"
-                      "Dit not find 'Gemaakte reizen'\n"
-                      "Please make sure you are logged in to the NS webpage and see the 'Gemaakte Reizen' element\n"
-                      "Then press Enter")
-                os.system('pause')
-
-    def download_excel_file(date_dict_str, browser_ns):
-        """
-        Takes in browser and dictionary containing date strings and downloads excel file.
-
-        :param date_dict_str: A dictionary containing the dates to fill in on ns webpage in string format
-        :type date_dict_str: dict
-        :param browser_ns: The browser object where the user is logge in to NS webpage
-        :type browser_ns: WebDriver
         :return:
         """
-
-        "Get string values to fill in on NS webpage"
-        from_day = browser_ns.find_element_by_xpath('//*[@id="dayField"]')
-        from_day.clear()
-        from_day.send_keys(date_dict_str['from_day'])
-        from_month = browser_ns.find_element_by_xpath('//*[@id="monthField"]')
-        from_month.clear()
-        from_month.send_keys(date_dict_str['from_month'])
-        from_year = browser_ns.find_element_by_xpath('//*[@id="yearField"]')
-        from_year.clear()
-        from_year.send_keys(date_dict_str['from_year'])
-        actionchains = ActionChains(browser_ns)
+        # Fill in the values in online form
+        element.send_keys(datum)
+        actionchains = ActionChains(browser_sogeti)
         actionchains.send_keys(Keys.TAB)
+        actionchains.send_keys(rit_nummer)
         actionchains.send_keys(Keys.TAB)
-        actionchains.send_keys(date_dict_str['until_day'])
-        actionchains.send_keys(date_dict_str['until_month'])
-        actionchains.send_keys(date_dict_str['until_year'])
+        actionchains.send_keys(ov_bedrag)
+        actionchains.send_keys(Keys.TAB)
+        actionchains.send_keys(Keys.TAB)
+        actionchains.send_keys(van_halte)
+        actionchains.send_keys(Keys.TAB)
+        actionchains.send_keys(naar_halte)
         actionchains.perform()
 
-        "Click the Zoeken button"
-        button_zoeken = browser_ns.find_element_by_xpath('/ html / body / main / div / div / div / div / div / div[2] / div[2] / div[1] / form / p / a[1] / span')
-        button_zoeken.click()
-
-        "Download the excel file"
-        button_download = browser_ns.find_element_by_css_selector('#ns-app > div.col-3b > div.title.box > ul > li > a')
-        button_download.click()
-
-        "Inform user to wait until download is finished"
-        print("---------------------------------------------------------------\n"
-              "Please wait until download is finished")
-
-        "Pause until download is finished"
-        os.system('pause')
-
-        "Close NS browser"
-        browser_ns.close()
-
-    def read_in_df():
-        """
-        Reads in downloaded excel file and returns it as a dataframe.
-
-        :return: The dataframe containing the expenses
-        :rtype: dataframe
-        """
-        list_of_files = glob.glob('C:\\Users\\jniens\\Downloads\\*')
-        latest_file = max(list_of_files, key=os.path.getctime)
-        df = pd.read_excel(latest_file)
-        # df = pd.read_excel('C:\\Users\\jniens\\Downloads\\reistransacties-3528010488672904 (11).xls')
-
-        return df
-
-    def filter_out_zero(df):
-        """
-        Cleans the dataframe and returns it.
-
-        :param df: The dataframe containing the expenses
-        :type df: dataframe
-        :return: The cleaned dataframe containing the expenses
-        :rtype: dataframe
+    def press_button():
         """
-        df.drop(df.tail(1).index, inplace=True)
-        df = df[df["Prijs (incl. btw)"] != 0]
-        df = df.sort_values('Datum')
-        df.reset_index(inplace=True)
-        del df['index']
-
-        return df
+        Decides whether to add new row or not based on which iteration it is on.
 
-    def check_amount(df, input_amount):
+        :return:
         """
-        Check whether inputted amount and calculated amount from Excel match and gives user option to continue if
-        values don't.
-
-        :param df: The dataframe containing the expenses
-        :type df: dataframe
-        :param input_amount: The input amount from user
-        :type input_amount: float
-        :return: None
+        # Press voeg_lege_regel_toe or opslaan_controle at last row, and save every CHECKPOINT_ROWS rows when
+        # journaling so a broken off submission can be resumed
+        if index < rows - 1:
+            if journal and (index + 1) % CHECKPOINT_ROWS == 0:
+                einstein_form.opslaan_controle()
+                journal_rows(index + 1)
+            einstein_form.add_row()
+        else:
+            einstein_form.opslaan_controle()
+            journal_rows(rows)
+
+    def journal_rows(until_row):
         """
+        Records the rows saved since the previous checkpoint in the journal.
 
-        # Calculate total amount
-        calc_amount = df['Prijs (incl. btw)'].sum()
-
-        # Round total amount to 2 decimals
-        calc_amount_round = round(calc_amount, 2)
-
-        # Check if input amount and calculated amount match
-        if calc_amount_round == input_amount:  # If both amounts match give user confirmation and continue
-            print("---------------------------------------------------------------\n"
-                  "Input amount and calculated amount from expense report match!\n"
-                  "Continuing...")
-        else: # If amounts don't match inform user and give option to abort or continue anyway
-            print(f"---------------------------------------------------------------\n"
-                  "Input amount and calculated amount don't match:"
-                  f"\n"
-                  f"Input amount: {input_amount}\n"
-                  f"Calculated amount: {calc_amount_round}")
-
-            while True:
-                value = input('Do you want to continue anyway [y to continue / n to quit]? ')
-                if value.lower() == 'y':
-                    print('Continuing...')
-                    break
-                elif value.lower() == 'n':
-                    print("---------------------------------------------------------------\n"
-                          'Abort process...')
-                    exit()
-                else:
-                    print("---------------------------------------------------------------\n"
-                          'Please input y or n')
-
-
-        return df
-
-    def login_sogeti_webpage():
+        :param until_row: The index after the last saved row
+        :type until_row: int
+        :return:
         """
-       Opens browser and aks user to login to Sogeti webpage.
+        if journal:
+            confirm_rows(journal, form_rows, range(journaled[0], until_row))
+            journaled[0] = until_row
 
-        :return: the webbrowser where user is logged in
-        :rtype: WebDriver
+    def fill_in_bulk():
         """
+        Adds the rows, fills in their values and presses opslaan_controle, using one script per step. When
+        journaling this is done CHECKPOINT_ROWS rows at a time, so a broken off submission can be resumed.
 
-        # Open browser and go to ns.nl login page
-        os.chdir('C:\\Users\\jniens\\Downloads')
-        browser_sogeti = webdriver.Chrome()
-        browser_sogeti.get('https://einstein.sogeti.nl/')
-
-        "Print instruction message for user"
-        print("---------------------------------------------------------------\n"
-              "Please log in to Sogeti webpage using your credentials")
-
-        "Pause the program to go to let user log in and navigate to fill in page"
-        os.system('pause')
-
-        return browser_sogeti
-
-    def check_sogeti_element(browser_sogeti):
+        :return:
         """
-        Checks if element "Mijn Sogeti" is found and clicks it.
-
-        :param browser_sogeti: The browser where the user is supposed to be logged in.
-        :type browser_sogeti: WebDriver
-        :return: None
+        batch_rows = CHECKPOINT_ROWS if journal else max(rows, 1)
+        for batch_start in range(start_row, rows, batch_rows):
+            batch_end = min(batch_start + batch_rows, rows)
+            # A new form starts with one empty row, a saved draft with its saved rows
+            add_rows(browser_sogeti, batch_end - batch_start - (1 if batch_start == 0 else 0))
+            wait_for_row_count(browser_sogeti, batch_end)
+            fill_rows(browser_sogeti, form_rows[batch_start:batch_end])
+            einstein_form.opslaan_controle()
+            journal_rows(batch_end)
+
+    def unselect_all():
         """
+        Unselects all expenses on online form.
 
-        "Try to find 'gemaakte reizen' and click it"
-        mijn_sogeti = None
-        while not mijn_sogeti:
-            try:
-                mijn_sogeti = browser_sogeti.find_element_by_xpath('//*[@id="block-menu-block-2"]/div/div/ul/li[2]/a')
-                mijn_sogeti.click()
-            except NoSuchElementException:
-                print("---------------------------------------------------------------\n"
-                      "Dit not find 'Gemaakte reizen'\n"
-                      "Please make sure you are logged in to the Sogeti webpage and see the 'Mijn Sogeti' element\n"
-                      "Then press Enter")
-                os.system('pause')
-
-    def fill_in_basics_sogeti(browser_sogeti, from_date, input_amount):
-        """
-        Reads in first date and amount, opens browser and fills in the expenses basics (including amount).
-
-        :param browser_sogeti: The webbrowser where user is logged in to Sogeti webpage.
-        :type browser_sogeti: WebDriver
-        :param from_date: first date of the period
-        :type from_date: datetime
-        :param input_amount: The inputted amount of the user
-        :type input_amount: float
-        :return: The driver object to be used to fill in the expenses row by row
-        :rtype: WebDriver
+        :return:
         """
+        # Unselect all rows
+        if bulk:
+            toggle_checkboxes(browser_sogeti, rows)
+        else:
+            for vinkje in einstein_form.checkboxes()[:rows]:
+                vinkje.click()
 
-        month_nr = from_date.month
-        year = from_date.year
-        month_and_year = from_date.strftime('%B %Y')
-        mijn_referentie = f'Expenses for {month_and_year}'
-        input_amount = str(input_amount)
-
-        # mijnDeclaratie
-        browser_sogeti.find_element_by_xpath('//*[@id="block-menu-block-5"]/div/div/ul/li[5]/ul/li[1]/a').click()
-
-        # Find the iFrame on fill in page
-        frame = browser_sogeti.find_element_by_xpath('//*[@id="node-34"]/div/div/div/div/iframe')
-        browser_sogeti.switch_to.frame(frame)
-
-        # dropdown Reiskosten YP
-        dropdown = Select(browser_sogeti.find_element_by_xpath('/html/body/form/table/tbody/tr[4]/td/select'))
-        dropdown.select_by_visible_text('Reiskosten YP')
-
-        # Press "Verder"
-        browser_sogeti.find_element_by_xpath('//*[@id="verderButton"]').click()
-
-        #Mijn referentie
-        txt_box_ref = browser_sogeti.find_element_by_xpath('/html/body/form/table/tbody/tr[8]/td[2]/input')
-        txt_box_ref.send_keys(mijn_referentie)
-
-        #Bedrag
-        txt_box_amount = browser_sogeti.find_element_by_xpath('/html/body/form/table/tbody/tr[10]/td[2]/input')
-        txt_box_amount.send_keys(input_amount)
-
-        # Click "vervolg declaratie
-        browser_sogeti.find_element_by_xpath('//*[@id="bvzm"]').click()
-
-        # # Change iframe
-        # frame = browser.find_element_by_xpath('//*[@id="node-34"]/div/div/div/div/iframe')
-        # browser.switch_to.frame(frame)
-
-        # Fill in month nr
-        txt_box_monthnr = browser_sogeti.find_element_by_xpath('//*[@id="decHeadings[0].decHeadingsValue"]')
-        txt_box_monthnr.send_keys(month_nr)
-        txt_box_monthnr.send_keys(Keys.TAB)
-        actionchains = ActionChains(browser_sogeti)
-        actionchains.send_keys(year)
-        actionchains.send_keys(Keys.TAB)
-        actionchains.send_keys(2)
-        actionchains.perform()
-
+        # Press OpslaanControle
+        einstein_form.opslaan_controle()
+
+    rows = len(df)
+    form_rows = prepare_form_rows(df)
+    einstein_form = EinsteinForm(browser_sogeti)
+    journaled = [start_row]
+    if bulk:
+        fill_in_bulk()
+    else:
+        if start_row > 0:
+            einstein_form.add_row()
+        for index, (element_name, datum, rit_nummer, ov_bedrag, van_halte, naar_halte) in enumerate(form_rows):
+            if index < start_row:
+                continue
+            with trace_row(index):
+                element = generate_element()
+                fill_in_values()
+                press_button()
+
+    # Pause the program, let user decide if he wants to progress
+    if confirm:
+        os.system('pause')
+    unselect_all()
+    if journal:
+        finish_declaration(journal)
+
+
+def check_chunks(df, amount, max_rows):
+    """
+    Checks that the chunks of a period add up to its amount, see chunk_amounts, so a period that can't be split is
+    refused before any declaration is started.
+
+    :param df: The cleaned dataframe containing the expenses
+    :type df: dataframe
+    :param amount: The amount checked by check_amount
+    :type amount: float
+    :param max_rows: The maximum number of rows per declaration, None for no maximum
+    :type max_rows: int
+    :return: None
+    """
+    if max_rows is not None and len(df) > max_rows:
+        chunk_amounts(split_chunks(df, max_rows), amount)
+
+
+@traced
+def submit_declaration(browser_sogeti, from_date, amount, df, max_rows=None, bulk=True):
+    """
+    Submits the expenses of a period as a single declaration, or as several declarations of at most max_rows rows.
+    Every chunk gets its own window of the same browser session, a ' (n/total)' suffix on 'Mijn referentie', its
+    own share of the amount and its own journal.
+
+    :param browser_sogeti: The webbrowser where user is logged in to Sogeti webpage.
+    :type browser_sogeti: WebDriver
+    :param from_date: first date of the period
+    :type from_date: datetime
+    :param amount: The amount checked by check_amount
+    :type amount: float
+    :param df: The cleaned dataframe containing the expenses
+    :type df: dataframe
+    :param max_rows: The maximum number of rows per declaration, None for no maximum
+    :type max_rows: int
+    :param bulk: Whether to fill in the rows with batched scripts instead of keystrokes per row, see loop_through_df
+    :type bulk: bool
+    :return: The driver object
+    :rtype: WebDriver
+    """
+    if max_rows is None or len(df) <= max_rows:
+        journal = journal_path(from_date)
+        browser_sogeti = fill_in_basics_sogeti(browser_sogeti, from_date, amount, journal)
+        loop_through_df(df, browser_sogeti, bulk, journal=journal)
         return browser_sogeti
 
-    def loop_through_df(df, browser_sogeti):
-        """
-        Fills in the expenses row by row on the webpage.
-
-        :param df: The dataframe containing the expenses
-        :type df: dataframe
-        :param browser_sogeti: The driver object to be used to fill in the expenses row by row
-        :type browser_sogeti: WebDriver
-        :return: None
-        """
-
-        def find_element(index):
-            """
-            Finds the element name of the input textbox based on the index of the dataframe.
-
-            :param index: the index of the row in the dataframe
-            :type index: int
-            :return: the name of the element to fill in the information
-            :rtype: str
-            """
-
-            if index != 0:
-                index += 1
-            element_name = str(index) + "_2"
-
-            return element_name
-
-        def return_date():
-            """
-            Returns the date of the row.
+    chunks = split_chunks(df, max_rows)
+    amounts = chunk_amounts(chunks, amount)
+    for number, (chunk, chunk_cents) in enumerate(zip(chunks, amounts), 1):
+        print("---------------------------------------------------------------\n"
+              f"Declaration {number} of {len(chunks)}: {len(chunk)} rows")
+        if number > 1:
+            "WebDriver drives one window at a time, so the chunks are filled in one after the other"
+            browser_sogeti.switch_to.default_content()
+            browser_sogeti.execute_script('window.open(arguments[0])', EINSTEIN_URL)
+            browser_sogeti.switch_to.window(browser_sogeti.window_handles[-1])
+            check_sogeti_element(browser_sogeti, interactive=False)
+        journal = journal_path(from_date, number)
+        browser_sogeti = fill_in_basics_sogeti(browser_sogeti, from_date, chunk_cents / 100, journal,
+                                               f' ({number}/{len(chunks)})')
+        loop_through_df(chunk, browser_sogeti, bulk, journal=journal)
+
+    return browser_sogeti
+
+
+@traced
+def fill_in_stream(stream_rows, browser_sogeti):
+    """
+    Browser sink of the pipeline: fills in every form row as it arrives, adding a row on the form before every row
+    but the first.
+
+    :param stream_rows: The form rows
+    :type stream_rows: iterable
+    :param browser_sogeti: The driver object where the expense form is opened
+    :type browser_sogeti: WebDriver
+    :return: The number of filled in rows
+    :rtype: int
+    """
+    einstein_form = EinsteinForm(browser_sogeti)
+    rows = 0
+    for index, form_row in enumerate(stream_rows):
+        with trace_row(index):
+            if index:
+                einstein_form.add_row()
+            wait_for_element(browser_sogeti, By.NAME, form_row.element_name, kind='rows')
+            fill_rows(browser_sogeti, [form_row])
+        rows += 1
+
+    return rows
+
+
+def stream_period(year, month_nr, amount, source, window=REORDER_ROWS):
+    """
+    Submits the declaration of a period from a pipeline source, typing every row as soon as the source delivers it.
+    The total is only known at the end, so it is checked before the form is saved.
+
+    :param year: The year value
+    :type year: int
+    :param month_nr: The month value
+    :type month_nr: int
+    :param amount: The input amount from user
+    :type amount: float
+    :param source: The transactions of a source, e.g. pipeline.ns_export_source or pipeline.ovchipkaart_source
+    :type source: iterable
+    :param window: The reorder window for sources that are not in date order
+    :type window: int
+    :return: None
+    """
+    from_date, until_date = define_period(year, month_nr)
+    browser_sogeti = login_sogeti_webpage()
+    check_sogeti_element(browser_sogeti)
+    browser_sogeti = fill_in_basics_sogeti(browser_sogeti, from_date, amount)
 
-            :return: the date of the expense
-            :rtype: str
-            """
-            datum = row.Datum
-
-            return datum
-
-        def return_ovbedrag():
-            """
-            Returns the amount of the expense row.
-
-            :return: the expense amount
-            :rtype: str
-            """
-            ov_bedrag = row['Prijs (incl. btw)']
-            ov_bedrag_str = str(ov_bedrag)
-
-            return ov_bedrag_str
-
-        def return_ritnummer(rit_nummer):
-            """
-            Returns the ritnummer to fill in on online form.
-
-            :param rit_nummer: The rit_nummer of the previous row.
-            :type rit_nummer: int
-            :return: The rit_nummer for the current row
-            :rtype: int
-            """
-            prev_datum = df.iloc[index - 1, 1]
-            datum = return_date()
-
-            "Determine 'ritnummer' based on datum and prev_datum"
-            if index == 0 or prev_datum != datum:
-                rit_nummer = 1
-            else:
-                rit_nummer += 1
-
-            return rit_nummer
-
-        def return_van_naar():
-            """
-            Returns the from and to locations of the expense row.
-
-            :return:
-            """
-            "Determine van_halte en naar_halte"
-            omschrijving = row.Omschrijving
-            find_cor = omschrijving.find('Correctietarief:')  # Checks if expense-record is Correctietarief
-
-            find_uit = omschrijving.find('-uit:')
-
-            "Find at what index to slice string"
-            if find_uit > -1:
-                start_string = find_uit + 6
-            else:
-                start_string = 0
-
-            sliced_str = omschrijving[start_string:]  # Slice string
-            find_sep = sliced_str.find('-')  # Returns -1 if "-" is not found
-
-            "This part extracts start and stop for each record" \
-            "If Exception is raised it gives default values"
-            van_halte = "Vanaf halte/station"
-            naar_halte = "Naar halte/station"
-            try:
-                if find_cor != -1:
-                    van_halte = "Correctietarief"
-                    naar_halte = "Correctietarief"
-
-                elif find_sep > 0:
-                    van_halte = sliced_str[:find_sep - 1]
-                    naar_halte = sliced_str[find_sep + 2:]
-
-                else:
-                    halte_regex = re.compile(r'(halte(\s[A-Z]\w+(\.)?)*)')
-                    van_halte = halte_regex.findall(sliced_str)[0][0]
-                    naar_halte = halte_regex.findall(sliced_str)[1][0]
-
-            except:
-                pass
-
-            return van_halte, naar_halte
-
-        def generate_element():
-            """
-            Generates browser element based on string name.
-
-            :return: The element to fill in the first value (factuurdatum) of the expense row.
-            :rtype: WebElement
-            """
-
-            element = browser_sogeti.find_element_by_name(element_name)
-
-            return element
-
-        def fill_in_values():
-            """
-            Fills in on values in in online form.
-
-            :return:
-            """
-            # Fill in the values in online form
-            element.send_keys(datum)
-            actionchains = ActionChains(browser_sogeti)
-            actionchains.send_keys(Keys.TAB)
-            actionchains.send_keys(rit_nummer)
-            actionchains.send_keys(Keys.TAB)
-            actionchains.send_keys(ov_bedrag)
-            actionchains.send_keys(Keys.TAB)
-            actionchains.send_keys(Keys.TAB)
-            actionchains.send_keys(van_halte)
-            actionchains.send_keys(Keys.TAB)
-            actionchains.send_keys(naar_halte)
-            actionchains.perform()
-
-        def press_button():
-            """
-            Decides whether to add new row or not based on which iteration it is on.
-
-            :return:
-            """
-            # Press voeg_lege_regel_toe or opslaan_controle at last row
-            voeg_lege_regel_toe = browser_sogeti.find_element_by_css_selector(
-                'body > form > table:nth-child(3) > tbody > tr:nth-child(2) > td > input.button')
-            try:
-                opslaan_controle = browser_sogeti.find_element_by_css_selector(
-                'body > form > table:nth-child(3) > tbody > tr:nth-child(2) > td > input:nth-child(13)')
-            except NoSuchElementException:
-                print('Niet gevonden')
-
-            if index < rows - 1:
-                voeg_lege_regel_toe.click()
-            else:
-                opslaan_controle.click()
-
-        def unselect_all():
-            """
-            Unselects all expenses on online form.
-
-            :return:
-            """
-            opslaan_controle = browser_sogeti.find_element_by_css_selector(
-                'body > form > table:nth-child(3) > tbody > tr:nth-child(2) > td > input:nth-child(13)')
-
-            # Unselect all rows
-            for i in range(rows):
-                vinkje = browser_sogeti.find_element_by_id('regelcheck' + str(i + 1))
-                vinkje.click()
+    totals = collections.Counter()
+    rows = fill_in_stream(form_rows(source, totals, window=window), browser_sogeti)
+    if totals['cents'] != amount_to_cents(amount):
+        raise ValueError(f"Input amount {amount} and the {rows} streamed rows ({format_cents(totals['cents'])}) "
+                         "don't match, the form has not been saved")
 
-            # Press OpslaanControle
-            opslaan_controle.click()
+    einstein_form = EinsteinForm(browser_sogeti)
+    einstein_form.opslaan_controle()
+    os.system('pause')
+    toggle_checkboxes(browser_sogeti, rows)
+    einstein_form.opslaan_controle()
 
-        rows = len(df)
-        rit_nummer = 0
-        "Modify for variable i based on variable index for inconsistencies in xpath names"
-        for index, row in df.iterrows():
 
-            element_name = find_element(index)
-            datum = return_date()
-            ov_bedrag = return_ovbedrag()
-            rit_nummer = return_ritnummer(rit_nummer)
-            van_halte, naar_halte = return_van_naar()
-            element = generate_element()
-            fill_in_values()
-            press_button()
+def main(resume=False):
+    """
+    This is the main function
 
-        # Pause the program, let user decide if he wants to progress
-        os.system('pause')
-        unselect_all()
+    :param resume: Whether to continue the draft declaration of the period from its journal
+    :type resume: bool
+    :return: None
+    """
 
     year = input_user_year()
     month_nr = input_user_month()
     amount = input_user_amount()
+    submit_period(year, month_nr, amount, resume=resume)
+
+
+def submit_period(year, month_nr, amount, export_paths=None, resume=False, max_rows=None, bulk=True):
+    """
+    Submits the declaration of a single period.
+
+    :param year: The year value
+    :type year: int
+    :param month_nr: The month value
+    :type month_nr: int
+    :param amount: The input amount from user
+    :type amount: float
+    :param export_paths: The paths of the excel files, the latest export is used when None
+    :type export_paths: list
+    :param resume: Whether to continue the draft declaration of the period from its journal, a new declaration is
+        started when nothing of it was saved
+    :type resume: bool
+    :param max_rows: The maximum number of rows per declaration, see submit_declaration
+    :type max_rows: int
+    :param bulk: Whether to fill in the rows with batched scripts instead of keystrokes per row, see loop_through_df
+    :type bulk: bool
+    :return: None
+    """
     from_date, until_date = define_period(year, month_nr)
     date_dict_str = string_period(from_date, until_date)
-    # browser_ns = login_ns_webpage()
-    # check_ns_element(browser_ns)
-    # download_excel_file(date_dict_str, browser_ns)
-    df_raw = read_in_df()
-    # df_raw = pd.read_excel('C:\\Users\\jniens\\Downloads\\reistransacties-3528010488672904 (16).xls')
-    df_filtered = filter_out_zero(df_raw)
+    journal = journal_path(from_date)
+    journal_state = None
+    if resume:
+        "A period split by max_rows has a journal per chunk, resuming those is not supported"
+        chunks = chunk_journals(from_date)
+        if chunks and (not os.path.exists(journal)
+                       or max(os.path.getmtime(chunk) for chunk in chunks) > os.path.getmtime(journal)):
+            print("---------------------------------------------------------------\n"
+                  f"The last submission of {from_date.strftime('%B %Y')} was split into {len(chunks)} "
+                  "declarations, which can't be resumed. Check their drafts on Einstein")
+            return
+        try:
+            journal_state = read_journal(journal)
+        except (OSError, ValueError):  # No journal, or none with a declaration in it
+            print("---------------------------------------------------------------\n"
+                  f"No submission of {from_date.strftime('%B %Y')} to resume, starting a new declaration")
+        if journal_state and journal_state['done']:
+            print("---------------------------------------------------------------\n"
+                  f"'{journal_state['reference']}' has already been submitted")
+            return
+
+    "Fetch and read in the NS export in a worker thread while the user logs in to Sogeti, join before filling in"
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='ns') as executor:
+        expenses = executor.submit(fetch_expenses, date_dict_str, export_paths)
+        browser_sogeti = login_sogeti_webpage()
+        check_sogeti_element(browser_sogeti)
+        df_filtered = expenses.result()
     check_amount(df_filtered, amount)
-    browser_sogeti = login_sogeti_webpage()
-    check_sogeti_element(browser_sogeti)
-    browser_sogeti = fill_in_basics_sogeti(browser_sogeti, from_date, amount)
-    loop_through_df(df_filtered, browser_sogeti)
+    check_chunks(df_filtered, amount, max_rows)
+    start_row = first_unconfirmed(journal_state, prepare_form_rows(df_filtered)) if journal_state else 0
+    if start_row > 0:
+        print("---------------------------------------------------------------\n"
+              f"Resuming '{journal_state['reference']}' from row {start_row + 1}")
+        browser_sogeti = open_draft_sogeti(browser_sogeti, journal_state['reference'])
+        loop_through_df(df_filtered, browser_sogeti, bulk, journal=journal, start_row=start_row)
+    else:
+        if journal_state:
+            "Nothing was saved, so there is no draft to open"
+            print("---------------------------------------------------------------\n"
+                  f"No rows of '{journal_state['reference']}' were saved, starting a new declaration")
+        submit_declaration(browser_sogeti, from_date, amount, df_filtered, max_rows, bulk)
+
+
+def run_batch(periods, fetch=False, max_rows=None, bulk=True):
+    """
+    Submits one declaration per period in a single browser session. The expense reports are read in by a worker
+    thread while the user logs in once, all of them are checked before the first declaration is started, and every
+    declaration is started from "mijnDeclaratie" in the same browser.
+
+    :param periods: tuples (year, month_nr, amount, export_paths), the latest export is used when export_paths is None
+    :type periods: list
+    :param fetch: Whether to fetch the exports that are not given from NS over HTTP, see fetch_batch_expenses
+    :type fetch: bool
+    :param max_rows: The maximum number of rows per declaration, see submit_declaration
+    :type max_rows: int
+    :param bulk: Whether to fill in the rows with batched scripts instead of keystrokes per row, see loop_through_df
+    :type bulk: bool
+    :return: None
+    """
+    declarations = []
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='ns') as executor:
+        expenses = executor.submit(fetch_batch_expenses, periods, fetch)
+        browser_sogeti = login_sogeti_webpage()
+        check_sogeti_element(browser_sogeti)
+        for (year, month_nr, amount, export_paths), df_filtered in zip(periods, expenses.result()):
+            from_date, until_date = define_period(year, month_nr)
+            print("---------------------------------------------------------------\n"
+                  f"Checking {from_date.strftime('%B %Y')}")
+            check_amount(df_filtered, amount)
+            check_chunks(df_filtered, amount, max_rows)
+            declarations.append((from_date, amount, df_filtered))
+
+    for from_date, amount, df_filtered in declarations:
+        print("---------------------------------------------------------------\n"
+              f"Submitting expenses for {from_date.strftime('%B %Y')}")
+        browser_sogeti = submit_declaration(browser_sogeti, from_date, amount, df_filtered, max_rows, bulk)
 
 
 if __name__ == '__main__':
-    main()
+    import cli
+
+    sys.exit(cli.main())
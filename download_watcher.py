@@ -0,0 +1,95 @@
+"""Finds the NS expense reports (reistransacties-*.xls) in the download directory
+and waits for a new one to finish downloading.
+
+The download directory is the Downloads folder of the user, unless the
+EXPENSE_DOWNLOAD_DIR environment variable points elsewhere."""
+import fnmatch
+import os
+import time
+
+DOWNLOAD_DIR_ENV = 'EXPENSE_DOWNLOAD_DIR'
+DOWNLOAD_DIR = os.environ.get(DOWNLOAD_DIR_ENV) or os.path.join(os.path.expanduser('~'), 'Downloads')
+EXPORT_PREFIX = 'reistransacties-'
+EXPORT_PATTERN = EXPORT_PREFIX + '*.xls'
+PARTIAL_SUFFIX = '.crdownload'
+
+
+def scan_exports(directory):
+    """
+    Yields the directory entries of the finished and partial NS expense reports. Other files are skipped on their
+    name alone, so they are never stat'ed.
+
+    :param directory: The directory the browser downloads to
+    :type directory: str
+    :return: generator of (entry, is_partial)
+    :rtype: generator
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name = entry.name.lower()
+            if not name.startswith(EXPORT_PREFIX):
+                continue
+            if name.endswith(PARTIAL_SUFFIX):
+                yield entry, True
+            elif fnmatch.fnmatch(name, EXPORT_PATTERN):
+                yield entry, False
+
+
+def latest_export(directory=DOWNLOAD_DIR):
+    """
+    Returns the path of the most recently created NS expense report in directory.
+
+    :param directory: The directory the browser downloads to
+    :type directory: str
+    :return: The path of the latest expense report
+    :rtype: str
+    """
+    exports = [entry for entry, is_partial in scan_exports(directory) if not is_partial]
+    if not exports:
+        raise FileNotFoundError(f"No {EXPORT_PATTERN} file found in {directory}")
+    latest = max(exports, key=lambda entry: entry.stat().st_ctime)
+
+    return latest.path
+
+
+def wait_for_export(directory=DOWNLOAD_DIR, started=None, timeout=300, poll_interval=0.5):
+    """
+    Waits until an NS expense report written after started has finished downloading, that is until its
+    .crdownload file has been renamed to the .xls file, and returns its path.
+
+    :param directory: The directory the browser downloads to
+    :type directory: str
+    :param started: The time.time() value from before the download was started, defaults to now
+    :type started: float
+    :param timeout: The maximum number of seconds to wait
+    :type timeout: float
+    :param poll_interval: The number of seconds between two checks of the directory
+    :type poll_interval: float
+    :return: The path of the downloaded expense report
+    :rtype: str
+    """
+    "Nothing is scanned up front, so the start-up time does not depend on the size of the directory"
+    if started is None:
+        started = time.time()
+    deadline = time.monotonic() + timeout
+
+    while True:
+        finished = []
+        downloading = False
+        for entry, is_partial in scan_exports(directory):
+            try:
+                written_after_start = entry.stat().st_mtime >= started
+            except FileNotFoundError:  # The .crdownload file was renamed while scanning
+                downloading = True
+                continue
+            if is_partial and written_after_start:
+                downloading = True
+            elif written_after_start:
+                finished.append(entry)
+
+        if finished and not downloading:
+            return max(finished, key=lambda entry: entry.stat().st_mtime).path
+
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"No finished {EXPORT_PATTERN} download in {directory} after {timeout} seconds")
+        time.sleep(poll_interval)
@@ -0,0 +1,172 @@
+"""The expense grid of the Einstein declaration form: a page object that caches
+the handles of its controls, and batched execute_script calls that fill in the
+grid instead of one WebDriver round trip per key press."""
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.by import By
+
+ADD_ROW_SELECTOR = 'body > form > table:nth-child(3) > tbody > tr:nth-child(2) > td > input.button'
+OPSLAAN_CONTROLE_SELECTOR = 'body > form > table:nth-child(3) > tbody > tr:nth-child(2) > td > input:nth-child(13)'
+CHECKBOX_ID_PREFIX = 'regelcheck'
+CHECKBOX_SELECTOR = f'input[id^="{CHECKBOX_ID_PREFIX}"]'
+ROW_DATUM_SELECTOR = 'input[name$="_2"]'
+
+"Position of ritnummer, bedrag, van and naar in the tab order, relative to the N_2 datum field"
+TAB_OFFSETS = [1, 2, 4, 5]
+
+ADD_ROWS_SCRIPT = """
+var selector = arguments[0];
+var count = arguments[1];
+for (var i = 0; i < count; i++) {
+    document.querySelector(selector).click();
+}
+return document.querySelectorAll(arguments[2]).length;
+"""
+
+FILL_ROWS_SCRIPT = """
+var rows = arguments[0];
+var offsets = arguments[1];
+var form = document.getElementsByName(rows[0][0])[0].form;
+var fields = Array.prototype.filter.call(form.elements, function (element) {
+    return !element.disabled && element.type !== 'hidden' && element.tabIndex >= 0;
+});
+var positions = new Map();
+fields.forEach(function (element, position) { positions.set(element, position); });
+
+function setValue(element, value) {
+    element.value = value;
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+}
+
+rows.forEach(function (row) {
+    var first = document.getElementsByName(row[0])[0];
+    var position = positions.get(first);
+    setValue(first, row[1]);
+    for (var i = 0; i < offsets.length; i++) {
+        setValue(fields[position + offsets[i]], row[i + 2]);
+    }
+});
+return rows.length;
+"""
+
+TOGGLE_CHECKBOXES_SCRIPT = """
+var prefix = arguments[0];
+var count = arguments[1];
+for (var i = 1; i <= count; i++) {
+    document.getElementById(prefix + i).click();
+}
+return count;
+"""
+
+
+def add_rows(browser_sogeti, count):
+    """
+    Clicks 'voeg lege regel toe' count times in a single script.
+
+    :param browser_sogeti: The driver object where the expense form is opened
+    :type browser_sogeti: WebDriver
+    :param count: The number of empty rows to add
+    :type count: int
+    :return: The number of datum fields on the form after adding the rows
+    :rtype: int
+    """
+    return browser_sogeti.execute_script(ADD_ROWS_SCRIPT, ADD_ROW_SELECTOR, count, ROW_DATUM_SELECTOR)
+
+
+def fill_rows(browser_sogeti, form_rows):
+    """
+    Fills in every expense row in a single script. Each row is a sequence of
+    (element_name, datum, rit_nummer, ov_bedrag, van_halte, naar_halte).
+
+    :param browser_sogeti: The driver object where the expense form is opened
+    :type browser_sogeti: WebDriver
+    :param form_rows: The values to fill in per row
+    :type form_rows: list
+    :return: The number of filled in rows
+    :rtype: int
+    """
+    if not form_rows:
+        return 0
+    form_rows = [[str(value) for value in form_row] for form_row in form_rows]
+
+    return browser_sogeti.execute_script(FILL_ROWS_SCRIPT, form_rows, TAB_OFFSETS)
+
+
+def toggle_checkboxes(browser_sogeti, count):
+    """
+    Clicks the regelcheck1 up to regelcheck<count> checkboxes in a single script.
+
+    :param browser_sogeti: The driver object where the expense form is opened
+    :type browser_sogeti: WebDriver
+    :param count: The number of rows on the form
+    :type count: int
+    :return: The number of toggled checkboxes
+    :rtype: int
+    """
+    return browser_sogeti.execute_script(TOGGLE_CHECKBOXES_SCRIPT, CHECKBOX_ID_PREFIX, count)
+
+
+class EinsteinForm:
+    """
+    Page object of the expense grid in the Einstein iframe. The stable controls are looked up once and their
+    WebElement handles are reused until the page replaces them (StaleElementReferenceException). Collections are
+    fetched with a single find_elements call.
+
+    :param browser_sogeti: The driver object, switched to the iframe of the expense form
+    :type browser_sogeti: WebDriver
+    """
+
+    LOCATORS = {
+        'add_row': (By.CSS_SELECTOR, ADD_ROW_SELECTOR),
+        'opslaan_controle': (By.CSS_SELECTOR, OPSLAAN_CONTROLE_SELECTOR),
+    }
+
+    def __init__(self, browser_sogeti):
+        self.browser_sogeti = browser_sogeti
+        self.handles = {}
+
+    def element(self, name, refresh=False):
+        """
+        Returns the cached handle of a stable control, looking it up on first use or when refresh is set.
+
+        :param name: The name of the control, a key of LOCATORS
+        :type name: str
+        :param refresh: Whether to look the control up again
+        :type refresh: bool
+        :return: The handle of the control
+        :rtype: WebElement
+        """
+        if refresh or name not in self.handles:
+            self.handles[name] = self.browser_sogeti.find_element(*self.LOCATORS[name])
+
+        return self.handles[name]
+
+    def click(self, name):
+        """
+        Clicks a stable control, looking it up again once if its cached handle has gone stale.
+
+        :param name: The name of the control, a key of LOCATORS
+        :type name: str
+        :return: None
+        """
+        try:
+            self.element(name).click()
+        except StaleElementReferenceException:
+            self.element(name, refresh=True).click()
+
+    def add_row(self):
+        """Clicks 'voeg lege regel toe'"""
+        self.click('add_row')
+
+    def opslaan_controle(self):
+        """Clicks 'OpslaanControle'"""
+        self.click('opslaan_controle')
+
+    def checkboxes(self):
+        """
+        Returns all regelcheck checkboxes in a single lookup.
+
+        :return: The checkboxes in the order of the rows
+        :rtype: list
+        """
+        return self.browser_sogeti.find_elements(By.CSS_SELECTOR, CHECKBOX_SELECTOR)
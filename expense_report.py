@@ -0,0 +1,327 @@
+"""The browser-free part of the program: the period and amount the user enters,
+reading in and checking the NS expense report, and compiling it into the
+submission plan. It does not import selenium, so checking a file stays fast."""
+import calendar
+import datetime
+import os
+import numpy as np
+import pandas as pd
+from submission_plan import compile_plan
+from reconciliation import CARD_COLUMN, DATUM_FORMAT, PRICE_CENTS_COLUMN, PRICE_COLUMN, print_mismatch, reconcile, \
+    to_cents
+from export_cache import load_cleaned
+from export_merge import merge_exports
+from instrumentation import traced
+
+
+@traced
+def input_user_year():
+    """
+    Lets user input year, checks if input is a type int and returns it.
+
+    :return: The value of the input year
+    :rtype: int
+    """
+
+    year = ''
+    while type(year) != int:
+        try:
+            year = input('Fill in expense year: ')
+            year = int(year)
+        except ValueError:
+            print("Please fill in an integer")
+
+    return year
+
+
+@traced
+def input_user_month():
+    """
+    Lets user input month, checks if input is a type int and between 0 and 13. Then returns it.
+
+    :return: The value of the input month
+    :rtype: int
+    """
+
+    month_nr = ''
+    within_range = False
+    while type(month_nr) != int or not within_range:
+        try:
+            month_nr = input('Fill in expense month (between 0 and 13): ')
+            month_nr = int(month_nr)
+            within_range = 0 < month_nr < 13
+        except ValueError:
+            print("Please fill in an integer")
+
+    return month_nr
+
+
+@traced
+def input_user_amount():
+    """
+    Lets user input amount, checks if input is a type float and returns it.
+
+    :return: The value of the input amount
+    :rtype: float
+    """
+
+    amount = ''
+    while type(amount) != float:
+        try:
+            amount  = input('Fill in expense amount: ')
+            amount = float(amount)
+        except ValueError:
+            print("Please fill in a number")
+
+    return amount
+
+
+@traced
+def define_period(year, month_nr):
+    """
+    Takes in year and month and returns first and last date.
+
+    :param year: The year value
+    :type year: int
+    :param month_nr: The month value
+    :type month_nr: int
+    :return: tuple (from_date, until_date)
+        WHERE
+        datetime from_date is the first date of the period
+        datetime until_date is the last date of the period
+    """
+
+    month_range = calendar.monthrange(year, month_nr)
+    first_day = 1
+    last_day = month_range[1]
+    from_date = datetime.datetime(year, month_nr, first_day)
+    until_date = datetime.datetime(year, month_nr, last_day)
+
+    return from_date, until_date
+
+
+@traced
+def string_period(from_date, until_date):
+    """
+    Turns datetime objects into string objects to fill in on NS webpage.
+
+    :param from_date: from_date: The first date of the period
+    :type from_date: datetime
+    :param until_date: The last date of the period
+    :type until_date: datetime
+    :return: A dictionary containing the string-date values to fill in on NS webpage.
+    :rtype: dict
+    """
+    date_dict_str = dict()
+    date_dict_str['from_day'] = str(from_date.day).zfill(2)
+    date_dict_str['from_month'] = str(from_date.month).zfill(2)
+    date_dict_str['from_year'] = str(from_date.year).zfill(4)
+
+    date_dict_str['until_day'] = str(until_date.day).zfill(2)
+    date_dict_str['until_month'] = str(until_date.month).zfill(2)
+    date_dict_str['until_year'] = str(until_date.year).zfill(4)
+
+    return date_dict_str
+
+
+"The only columns of the export the program uses, CARD_COLUMN is read in as well when the export has it"
+EXPORT_COLUMNS = ['Datum', 'Omschrijving', PRICE_COLUMN]
+
+
+def compact_export(df):
+    """
+    Stores the used columns of an export in compact types: Datum as datetime64, Omschrijving as a categorical, as
+    most descriptions repeat, and the price as integer cents in PRICE_CENTS_COLUMN instead of a float. The card
+    number, if the export has it, is kept as a categorical of its digits.
+
+    :param df: The export as read from the excel file
+    :type df: dataframe
+    :return: The dataframe containing the expenses
+    :rtype: dataframe
+    """
+    compact = pd.DataFrame({'Datum': pd.to_datetime(df['Datum'], format=DATUM_FORMAT),
+                            'Omschrijving': df['Omschrijving'].astype('category'),
+                            PRICE_CENTS_COLUMN: to_cents(df[PRICE_COLUMN].fillna(0))})
+    if CARD_COLUMN in df:
+        compact[CARD_COLUMN] = df[CARD_COLUMN].fillna('').astype(str).str.replace(r'\D', '', regex=True) \
+            .astype('category')
+
+    return compact
+
+
+@traced
+def read_in_df(export_path):
+    """
+    Reads in the used columns of the downloaded excel file and returns them as a compact dataframe.
+
+    :param export_path: The path of the downloaded excel file
+    :type export_path: str
+    :return: The dataframe containing the expenses
+    :rtype: dataframe
+    """
+    df = pd.read_excel(export_path, usecols=lambda column: column in EXPORT_COLUMNS or column == CARD_COLUMN,
+                       dtype={PRICE_COLUMN: 'float64', CARD_COLUMN: str})
+    # df = pd.read_excel('C:\\Users\\jniens\\Downloads\\reistransacties-3528010488672904 (11).xls')
+
+    return compact_export(df)
+
+
+@traced
+def filter_out_zero(df):
+    """
+    Cleans the dataframe and returns it: drops the totals row and the expenses without a price, and sorts on Datum.
+    The rows to keep are worked out as positions first, so every column is copied only once.
+
+    :param df: The dataframe containing the expenses
+    :type df: dataframe
+    :return: The cleaned dataframe containing the expenses
+    :rtype: dataframe
+    """
+    keep = df[PRICE_CENTS_COLUMN].to_numpy() != 0
+    keep[-1:] = False  # The last row holds the totals
+    positions = np.flatnonzero(keep)
+
+    "A stable sort, so the expenses of a day keep the order of the export"
+    positions = positions[np.argsort(df['Datum'].to_numpy()[positions], kind='stable')]
+    df = pd.DataFrame({column: df[column].array.take(positions) for column in df.columns})
+
+    return df
+
+
+@traced
+def load_expenses(export_path):
+    """
+    Reads in and cleans the downloaded excel file, or loads the cleaned dataframe from the cache.
+
+    :param export_path: The path of the downloaded excel file
+    :type export_path: str
+    :return: The cleaned dataframe containing the expenses
+    :rtype: dataframe
+    """
+    df = load_cleaned(export_path, lambda path: filter_out_zero(read_in_df(path)))
+
+    return df
+
+
+@traced
+def load_exports(export_paths):
+    """
+    Reads in and cleans one or more downloaded excel files. Several files are merged into one dataframe, without the
+    transactions that more than one of them contains.
+
+    :param export_paths: The paths of the downloaded excel files
+    :type export_paths: list
+    :return: The cleaned dataframe containing the expenses
+    :rtype: dataframe
+    """
+    if len(export_paths) == 1:
+        return load_expenses(export_paths[0])
+
+    return merge_exports(export_paths, load_expenses)
+
+
+def calculate_amount(df):
+    """
+    Returns the total amount of the expenses, rounded to 2 decimals.
+
+    :param df: The dataframe containing the expenses
+    :type df: dataframe
+    :return: The total amount
+    :rtype: float
+    """
+
+    # Calculate total amount in whole cents, so no float rounding errors add up
+    calc_cents = df[PRICE_CENTS_COLUMN].sum()
+
+    # Back to euros with 2 decimals
+    calc_amount_round = int(calc_cents) / 100
+
+    return calc_amount_round
+
+
+@traced
+def check_amount(df, input_amount, interactive=True):
+    """
+    Check whether inputted amount and calculated amount from Excel match, in integer cents. If they don't, shows the
+    subtotals per day and the rows that explain the difference, and gives user option to continue.
+
+    :param df: The dataframe containing the expenses
+    :type df: dataframe
+    :param input_amount: The input amount from user
+    :type input_amount: float
+    :param interactive: Whether to ask the user to continue when the amounts don't match, instead of raising
+    :type interactive: bool
+    :return: None
+    """
+
+    reconciliation = reconcile(df, input_amount)
+    calc_amount_round = reconciliation['total_cents'] / 100
+
+    # Check if input amount and calculated amount match
+    if reconciliation['difference_cents'] == 0:  # If both amounts match give user confirmation and continue
+        print("---------------------------------------------------------------\n"
+              "Input amount and calculated amount from expense report match!\n"
+              "Continuing...")
+    else: # If amounts don't match inform user and give option to abort or continue anyway
+        print(f"---------------------------------------------------------------\n"
+              "Input amount and calculated amount don't match:"
+              f"\n"
+              f"Input amount: {input_amount}\n"
+              f"Calculated amount: {calc_amount_round}")
+        print_mismatch(df, reconciliation)
+        if not interactive:
+            raise ValueError("Input amount and calculated amount don't match")
+
+        while True:
+            value = input('Do you want to continue anyway [y to continue / n to quit]? ')
+            if value.lower() == 'y':
+                print('Continuing...')
+                break
+            elif value.lower() == 'n':
+                print("---------------------------------------------------------------\n"
+                      'Abort process...')
+                exit()
+            else:
+                print("---------------------------------------------------------------\n"
+                      'Please input y or n')
+
+
+    return df
+
+
+@traced
+def prepare_form_rows(df):
+    """
+    Works out the values to fill in on the online form for every expense row.
+
+    :param df: The dataframe containing the expenses
+    :type df: dataframe
+    :return: The submission plan, one FormRow (element_name, datum, rit_nummer, ov_bedrag, van_halte, naar_halte)
+        per row
+    :rtype: tuple
+    """
+    form_rows = compile_plan(df)
+
+    return form_rows
+
+
+def parse_period_arg(period_arg):
+    """
+    Turns a command line argument 'YYYY-MM=amount[=export_path[,export_path...]]' into a period tuple for run_batch. The
+    export paths are made absolute, as login_sogeti_webpage changes the working directory while they are read in.
+
+    :param period_arg: The command line argument
+    :type period_arg: str
+    :return: tuple (year, month_nr, amount, export_paths), export_paths is None when not given
+    :rtype: tuple
+    """
+    parts = period_arg.split('=', 2)
+    if len(parts) < 2:
+        raise ValueError(f"Expected YYYY-MM=amount[=export_path[,export_path...]], got {period_arg!r}")
+    year, month_nr = (int(value) for value in parts[0].split('-'))
+    if not 0 < month_nr < 13:
+        raise ValueError(f"Month must be between 0 and 13, got {month_nr}")
+    amount = float(parts[1])
+    export_paths = [os.path.abspath(export_path) for export_path in parts[2].split(',')] if len(parts) == 3 else None
+
+    return year, month_nr, amount, export_paths
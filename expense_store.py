@@ -0,0 +1,159 @@
+"""A local SQLite store of every ingested NS transaction, so questions about
+past travel spend are answered from an index instead of by parsing old
+downloads again.
+
+The transactions table is indexed on date, card and route (van_halte,
+naar_halte) and has the same identity of a transaction as export_merge, so
+ingesting an overlapping export adds nothing. month_totals keeps the total per
+month and card, and is refreshed for the months an ingest touches."""
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+from export_merge import transactions
+from halte_parser import parse_van_naar
+from reconciliation import PRICE_CENTS_COLUMN
+
+STORE_PATH = os.path.join(os.path.expanduser('~'), '.expense_automation', 'expenses.sqlite')
+
+"The primary key starts with datum, so it doubles as the date index"
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    datum TEXT NOT NULL,
+    omschrijving TEXT NOT NULL,
+    cents INTEGER NOT NULL,
+    card TEXT NOT NULL,
+    occurrence INTEGER NOT NULL,
+    van_halte TEXT NOT NULL,
+    naar_halte TEXT NOT NULL,
+    PRIMARY KEY (datum, omschrijving, cents, card, occurrence)
+);
+CREATE INDEX IF NOT EXISTS transactions_card ON transactions (card, datum);
+CREATE INDEX IF NOT EXISTS transactions_route ON transactions (van_halte, naar_halte);
+CREATE TABLE IF NOT EXISTS month_totals (
+    month TEXT NOT NULL,
+    card TEXT NOT NULL,
+    cents INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    PRIMARY KEY (month, card)
+);
+"""
+
+REFRESH_TOTALS = """
+INSERT OR REPLACE INTO month_totals (month, card, cents, rows)
+SELECT substr(datum, 1, 7), card, SUM(cents), COUNT(*) FROM transactions
+WHERE datum >= ? AND datum < ? GROUP BY substr(datum, 1, 7), card
+"""
+
+
+def connect(store_path=STORE_PATH):
+    """
+    Opens the store, creating it if needed.
+
+    :param store_path: The path of the SQLite file
+    :type store_path: str
+    :return: The connection
+    :rtype: Connection
+    """
+    os.makedirs(os.path.dirname(store_path) or '.', exist_ok=True)
+    connection = sqlite3.connect(store_path)
+    connection.executescript(SCHEMA)
+
+    return connection
+
+
+def ingest(connection, df, card):
+    """
+    Writes the transactions of a cleaned dataframe to the store and refreshes the totals of their months.
+
+    :param connection: The connection to the store
+    :type connection: Connection
+    :param df: The cleaned dataframe containing the expenses
+    :type df: dataframe
+    :param card: The card number of the export, for the rows without a Kaartnummer
+    :type card: str
+    :return: The number of transactions that were not in the store yet
+    :rtype: int
+    """
+    if df.empty:
+        return 0
+    routes = parse_van_naar(df['Omschrijving'])
+    rows = [(datum.strftime('%Y-%m-%d'), omschrijving, cents, row_card, occurrence, van_halte, naar_halte)
+            for (datum, omschrijving, cents, row_card, occurrence), van_halte, naar_halte
+            in zip(transactions(df, card), routes['van_halte'].tolist(), routes['naar_halte'].tolist())]
+
+    with connection:
+        before = connection.total_changes
+        connection.executemany('INSERT OR IGNORE INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        added = connection.total_changes - before
+        first_month = df['Datum'].min().strftime('%Y-%m')
+        after_last_month = (df['Datum'].max() + pd.offsets.MonthBegin()).strftime('%Y-%m')
+        connection.execute(REFRESH_TOTALS, (first_month, after_last_month))
+
+    return added
+
+
+def month_totals(connection, year=None):
+    """
+    Returns the stored total per month and card.
+
+    :param connection: The connection to the store
+    :type connection: Connection
+    :param year: Only return the months of this year
+    :type year: int
+    :return: tuples (month, card, cents, rows), ordered on month and card
+    :rtype: list
+    """
+    if year is None:
+        return connection.execute('SELECT * FROM month_totals ORDER BY month, card').fetchall()
+
+    return connection.execute('SELECT * FROM month_totals WHERE month >= ? AND month < ? ORDER BY month, card',
+                              (f'{year:04d}', f'{year + 1:04d}')).fetchall()
+
+
+def top_routes(connection, year, limit=10):
+    """
+    Returns the routes that cost the most in a year.
+
+    :param connection: The connection to the store
+    :type connection: Connection
+    :param year: The year
+    :type year: int
+    :param limit: The number of routes
+    :type limit: int
+    :return: tuples (van_halte, naar_halte, cents, rows), the most expensive first
+    :rtype: list
+    """
+    return connection.execute(
+        'SELECT van_halte, naar_halte, SUM(cents), COUNT(*) FROM transactions WHERE datum >= ? AND datum < ? '
+        'GROUP BY van_halte, naar_halte ORDER BY SUM(cents) DESC LIMIT ?',
+        (f'{year:04d}-01-01', f'{year + 1:04d}-01-01', limit)).fetchall()
+
+
+def load_month(connection, year, month_nr, card=None):
+    """
+    Returns the stored transactions of a month as a cleaned dataframe, like load_expenses.
+
+    :param connection: The connection to the store
+    :type connection: Connection
+    :param year: The year value
+    :type year: int
+    :param month_nr: The month value
+    :type month_nr: int
+    :param card: Only return the transactions of this card
+    :type card: str
+    :return: The cleaned dataframe containing the expenses
+    :rtype: dataframe
+    """
+    first_day = pd.Timestamp(year, month_nr, 1)
+    query = 'SELECT datum, omschrijving, cents FROM transactions WHERE datum >= ? AND datum < ?'
+    parameters = [first_day.strftime('%Y-%m-%d'), (first_day + pd.offsets.MonthBegin()).strftime('%Y-%m-%d')]
+    if card is not None:
+        query += ' AND card = ?'
+        parameters.append(card)
+    rows = connection.execute(query + ' ORDER BY datum, rowid', parameters).fetchall()
+    datum, omschrijving, cents = zip(*rows) if rows else ((), (), ())
+
+    return pd.DataFrame({'Datum': pd.to_datetime(list(datum), format='%Y-%m-%d'),
+                         'Omschrijving': pd.Categorical(omschrijving),
+                         PRICE_CENTS_COLUMN: np.array(cents, dtype='int64')})
@@ -0,0 +1,107 @@
+"""Keeps the cleaned dataframe of every parsed NS expense report on disk, so
+re-running a month does not parse the excel file again.
+
+The cache files are feather (Arrow) files named after a hash of the excel file's
+contents and PARSER_VERSION. The least recently used files are removed once the
+cache grows beyond MAX_CACHE_BYTES. Without pyarrow the cache is skipped."""
+import hashlib
+import os
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.expense_automation', 'cache')
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+CACHE_SUFFIX = '.feather'
+
+"Bump this whenever read_in_df or filter_out_zero changes the cleaned dataframe"
+PARSER_VERSION = 3
+
+try:
+    import pyarrow  # noqa: F401  (used by pandas for the feather format)
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+
+
+def export_key(export_path, parser_version=PARSER_VERSION):
+    """
+    Returns the cache key of an expense report: the sha256 of its contents and the parser version.
+
+    :param export_path: The path of the downloaded excel file
+    :type export_path: str
+    :param parser_version: The version of the parse steps
+    :type parser_version: int
+    :return: The cache key
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    with open(export_path, 'rb') as export_file:
+        for block in iter(lambda: export_file.read(1024 * 1024), b''):
+            digest.update(block)
+
+    return f'{digest.hexdigest()}-v{parser_version}'
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Removes the least recently used cache files until the cache is at most max_bytes.
+
+    :param cache_dir: The directory of the cache files
+    :type cache_dir: str
+    :param max_bytes: The maximum total size of the cache files
+    :type max_bytes: int
+    :return: The number of removed files
+    :rtype: int
+    """
+    with os.scandir(cache_dir) as entries:
+        cache_files = [(entry.stat(), entry.path) for entry in entries if entry.name.endswith(CACHE_SUFFIX)]
+
+    total_bytes = sum(stat.st_size for stat, path in cache_files)
+    removed = 0
+    for stat, path in sorted(cache_files, key=lambda cache_file: cache_file[0].st_mtime):
+        if total_bytes <= max_bytes:
+            break
+        os.remove(path)
+        total_bytes -= stat.st_size
+        removed += 1
+
+    return removed
+
+
+def load_cleaned(export_path, parse, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Returns the cleaned dataframe of an expense report from the cache, or parses it with parse and stores the
+    result in the cache.
+
+    :param export_path: The path of the downloaded excel file
+    :type export_path: str
+    :param parse: Function that takes export_path and returns the cleaned dataframe
+    :type parse: callable
+    :param cache_dir: The directory of the cache files
+    :type cache_dir: str
+    :param max_bytes: The maximum total size of the cache files
+    :type max_bytes: int
+    :return: The cleaned dataframe containing the expenses
+    :rtype: dataframe
+    """
+    if not CACHE_AVAILABLE:
+        return parse(export_path)
+
+    cache_path = os.path.join(cache_dir, export_key(export_path) + CACHE_SUFFIX)
+    if os.path.exists(cache_path):
+        os.utime(cache_path)  # Mark as recently used for the eviction
+        return pd.read_feather(cache_path)
+
+    df = parse(export_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    "Write to a temporary file first so an interrupted run never leaves half a cache file"
+    temp_path = cache_path + '.tmp'
+    try:
+        df.reset_index(drop=True).to_feather(temp_path)
+    except (ValueError, TypeError):  # Columns arrow can not store, e.g. mixed types; just don't cache
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return df
+    os.replace(temp_path, cache_path)
+    evict(cache_dir, max_bytes)
+
+    return df
@@ -0,0 +1,117 @@
+"""Merges several NS expense reports, e.g. of more than one card or of
+overlapping periods, into one cleaned dataframe without duplicate transactions.
+
+Every cleaned report is already sorted on Datum, so the reports are merged as
+sorted streams instead of being concatenated and sorted again. A transaction is
+identified by (Datum, Omschrijving, price, card, occurrence), where occurrence
+counts the identical rides of a card on a day within one report, so two equal
+bus rides on one day are both kept while an overlapping report adds nothing.
+
+The card is read from the Kaartnummer column of the report. Only for rows
+without one, or reports without the column, the card number in the file name is
+used."""
+import heapq
+import operator
+import os
+import re
+import numpy as np
+import pandas as pd
+from reconciliation import CARD_COLUMN, PRICE_CENTS_COLUMN
+
+"The card number NS puts in the file name, e.g. reistransacties-3528010488672904 (16).xls"
+CARD_REGEX = re.compile(r'reistransacties-(?P<card>\d+)', re.IGNORECASE)
+
+
+def export_card(export_path):
+    """
+    Returns the card number in the file name of an export.
+
+    :param export_path: The path of the excel file
+    :type export_path: str
+    :return: The card number, an empty string when the file name has none
+    :rtype: str
+    """
+    match = CARD_REGEX.match(os.path.basename(export_path))
+
+    return match.group('card') if match else ''
+
+
+def transaction_cards(df, card):
+    """
+    Returns the card of every transaction of a cleaned report: its Kaartnummer, or card when it has none.
+
+    :param df: The cleaned dataframe containing the expenses
+    :type df: dataframe
+    :param card: The card number of the report, e.g. from export_card
+    :type card: str
+    :return: The card numbers, with the index of df
+    :rtype: Series
+    """
+    if CARD_COLUMN not in df:
+        return pd.Series(card, index=df.index, dtype=object)
+
+    cards = df[CARD_COLUMN].astype(object)
+
+    return cards.mask(cards.isna() | (cards == ''), card)
+
+
+def occurrences(df, cards):
+    """
+    Returns for every transaction how many identical transactions of the same card come before it in the report.
+
+    :param df: The cleaned dataframe containing the expenses
+    :type df: dataframe
+    :param cards: The result of transaction_cards
+    :type cards: Series
+    :return: The occurrences, with the index of df
+    :rtype: Series
+    """
+    keys = [df['Datum'], df['Omschrijving'], df[PRICE_CENTS_COLUMN], cards.rename('card')]
+
+    return df.groupby(keys, sort=False, observed=True).cumcount()
+
+
+def transactions(df, card):
+    """
+    Returns the transactions of a cleaned report as (Datum, Omschrijving, price, card, occurrence) tuples.
+
+    :param df: The cleaned dataframe containing the expenses
+    :type df: dataframe
+    :param card: The card number of the report, for the rows without a Kaartnummer
+    :type card: str
+    :return: iterator of tuples, in the order of df
+    :rtype: iterator
+    """
+    cards = transaction_cards(df, card)
+
+    return zip(df['Datum'].tolist(), df['Omschrijving'].tolist(), df[PRICE_CENTS_COLUMN].tolist(),
+               cards.tolist(), occurrences(df, cards).tolist())
+
+
+def merge_exports(export_paths, load):
+    """
+    Loads every export and merges them into one dataframe sorted on Datum, without duplicate transactions.
+
+    :param export_paths: The paths of the excel files
+    :type export_paths: list
+    :param load: Function that returns the cleaned dataframe of an excel file, e.g. load_expenses
+    :type load: callable
+    :return: The cleaned dataframe containing the expenses of all exports
+    :rtype: dataframe
+    """
+    streams = [transactions(load(export_path), export_card(export_path)) for export_path in export_paths]
+
+    "heapq.merge keeps the order of the streams for equal dates, so the merge is stable like filter_out_zero"
+    seen = set()
+    rows = []
+    for transaction in heapq.merge(*streams, key=operator.itemgetter(0)):
+        if transaction not in seen:
+            seen.add(transaction)
+            rows.append(transaction[:4])
+
+    datum, omschrijving, cents, cards = zip(*rows) if rows else ((), (), (), ())
+
+    return pd.DataFrame({'Datum': pd.to_datetime(list(datum)),
+                         'Omschrijving': pd.Categorical(omschrijving),
+                         PRICE_CENTS_COLUMN: np.array(cents, dtype='int64'),
+                         CARD_COLUMN: pd.Categorical(cards)})
@@ -0,0 +1,124 @@
+"""Extracts the from and to stations (van_halte / naar_halte) out of the
+'Omschrijving' column of an NS expense report."""
+import re
+import numpy as np
+import pandas as pd
+
+VAN_HALTE_DEFAULT = "Vanaf halte/station"
+NAAR_HALTE_DEFAULT = "Naar halte/station"
+CORRECTIETARIEF = "Correctietarief"
+
+"Compiled once on import instead of on every row"
+HALTE_REGEX = re.compile(r'(halte(\s[A-Z]\w+(\.)?)*)')
+UIT_PREFIX_REGEX = re.compile(r'^.*?-uit:.?', re.DOTALL)
+SEPARATOR_REGEX = re.compile(r'^(?P<van_halte>[^-]*)[^-]-.?(?P<naar_halte>.*)$', re.DOTALL)
+
+
+def return_van_naar(omschrijving):
+    """
+    Returns the from and to locations of a single expense description. This is the row-wise version of
+    parse_van_naar and is kept as reference.
+
+    :param omschrijving: The description of the expense row
+    :type omschrijving: str
+    :return: tuple (van_halte, naar_halte)
+    :rtype: tuple
+    """
+    find_cor = omschrijving.find('Correctietarief:')  # Checks if expense-record is Correctietarief
+
+    find_uit = omschrijving.find('-uit:')
+
+    "Find at what index to slice string"
+    if find_uit > -1:
+        start_string = find_uit + 6
+    else:
+        start_string = 0
+
+    sliced_str = omschrijving[start_string:]  # Slice string
+    find_sep = sliced_str.find('-')  # Returns -1 if "-" is not found
+
+    "This part extracts start and stop for each record" \
+    "If Exception is raised it gives default values"
+    van_halte = VAN_HALTE_DEFAULT
+    naar_halte = NAAR_HALTE_DEFAULT
+    try:
+        if find_cor != -1:
+            van_halte = CORRECTIETARIEF
+            naar_halte = CORRECTIETARIEF
+
+        elif find_sep > 0:
+            van_halte = sliced_str[:find_sep - 1]
+            naar_halte = sliced_str[find_sep + 2:]
+
+        else:
+            haltes = HALTE_REGEX.findall(sliced_str)
+            van_halte = haltes[0][0]
+            naar_halte = haltes[1][0]
+
+    except IndexError:
+        pass
+
+    return van_halte, naar_halte
+
+
+def parse_van_naar(omschrijving):
+    """
+    Returns the from and to locations for a whole column of expense descriptions in one pass. Applies the same
+    rules as return_van_naar: 'Correctietarief:' first, then the part after '-uit:' split on the first '-', and
+    finally the first two 'halte ...' matches.
+
+    :param omschrijving: The 'Omschrijving' column of the dataframe containing the expenses
+    :type omschrijving: Series
+    :return: A dataframe with the columns 'van_halte' and 'naar_halte' and the same index as omschrijving
+    :rtype: dataframe
+    """
+    "Parse every distinct description once, most rows of an export repeat a route"
+    if isinstance(omschrijving.dtype, pd.CategoricalDtype):
+        "The last distinct value stands for the missing ones (code -1)"
+        distinct = pd.Series(list(omschrijving.cat.categories) + [''])
+        codes = omschrijving.cat.codes.to_numpy()
+        codes = np.where(codes < 0, len(distinct) - 1, codes)
+    else:
+        codes, distinct = pd.factorize(omschrijving.fillna('').astype(str))
+        distinct = pd.Series(distinct, dtype=object)
+    routes = parse_distinct(distinct).take(codes)
+    routes.index = omschrijving.index
+
+    return routes
+
+
+def parse_distinct(omschrijving):
+    """
+    Applies the rules of parse_van_naar to a column of descriptions, with vectorized string operations.
+
+    :param omschrijving: The descriptions, as strings
+    :type omschrijving: Series
+    :return: A dataframe with the columns 'van_halte' and 'naar_halte' and the same index as omschrijving
+    :rtype: dataframe
+    """
+    routes = pd.DataFrame({'van_halte': VAN_HALTE_DEFAULT, 'naar_halte': NAAR_HALTE_DEFAULT},
+                          index=omschrijving.index)
+
+    "Slice off everything up to and including '-uit:' and the character after it"
+    sliced_str = omschrijving.str.replace(UIT_PREFIX_REGEX, '', n=1, regex=True)
+
+    is_cor = omschrijving.str.contains('Correctietarief:', regex=False)
+    has_sep = ~is_cor & (sliced_str.str.find('-') > 0)
+    use_regex = ~is_cor & ~has_sep
+
+    routes.loc[is_cor, ['van_halte', 'naar_halte']] = CORRECTIETARIEF
+
+    if has_sep.any():
+        split = sliced_str[has_sep].str.extract(SEPARATOR_REGEX)
+        routes.loc[has_sep, ['van_halte', 'naar_halte']] = split[['van_halte', 'naar_halte']].values
+
+    if use_regex.any():
+        "Only the first two matches of each row are used, like findall()[0] and findall()[1]"
+        matches = sliced_str[use_regex].str.extractall(HALTE_REGEX)[0]
+        match_nr = matches.index.get_level_values('match')
+        first = matches[match_nr == 0].droplevel('match')
+        second = matches[match_nr == 1].droplevel('match')
+        routes.loc[first.index, 'van_halte'] = first
+        routes.loc[second.index, 'naar_halte'] = second
+
+    return routes
@@ -0,0 +1,262 @@
+"""Opt-in timing of the pipeline stages and counting of the WebDriver commands
+they send, per stage and per expense row.
+
+Tracing is off unless enable_tracing is called, e.g. by setting the EXPENSE_TRACE
+environment variable to the path of the JSON trace to write. finish_tracing
+writes the trace and prints a summary table."""
+import collections
+import contextlib
+import functools
+import json
+import threading
+import time
+
+TRACE_ENV = 'EXPENSE_TRACE'
+
+"WebDriver command names grouped by type, other commands are counted under their own name"
+COMMAND_TYPES = {
+    'findElement': 'find_element',
+    'findElements': 'find_element',
+    'findChildElement': 'find_element',
+    'findChildElements': 'find_element',
+    'sendKeysToElement': 'send_keys',
+    'sendKeysToActiveElement': 'send_keys',
+    'clickElement': 'click',
+    'actions': 'actions',
+    'executeScript': 'execute_script',
+    'w3cExecuteScript': 'execute_script',
+}
+PERFORM = 'ActionChains.perform'
+
+TRACER = None
+
+
+class Tracer:
+    """
+    Records the wall time and WebDriver commands of every stage, and of every expense row within a stage.
+
+    :param trace_path: The path to write the JSON trace to
+    :type trace_path: str
+    """
+
+    def __init__(self, trace_path):
+        self.trace_path = trace_path
+        self.started = time.time()
+        self.stages = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def current(self):
+        """
+        Returns the innermost stage and row record of the calling thread.
+
+        :return: tuple (stage, row), both None outside a stage or row
+        :rtype: tuple
+        """
+        stack = getattr(self.local, 'stack', [])
+        return (stack[-1] if stack else None), getattr(self.local, 'row', None)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Records the wall time and commands of the code within the with-block as stage name.
+
+        :param name: The name of the stage
+        :type name: str
+        """
+        record = {'stage': name, 'thread': threading.current_thread().name, 'start': time.time() - self.started,
+                  'seconds': 0.0, 'commands': collections.Counter(), 'rows': []}
+        with self.lock:
+            self.stages.append(record)
+        self.local.stack = getattr(self.local, 'stack', []) + [record]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self.local.stack = self.local.stack[:-1]
+
+    @contextlib.contextmanager
+    def row(self, index):
+        """
+        Records the wall time and commands of the code within the with-block as expense row index of the current
+        stage.
+
+        :param index: The index of the expense row
+        :type index: int
+        """
+        stage_record, _ = self.current()
+        record = {'index': index, 'seconds': 0.0, 'commands': collections.Counter()}
+        if stage_record is not None:
+            stage_record['rows'].append(record)
+        self.local.row = record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self.local.row = None
+
+    def count(self, command_type):
+        """
+        Counts one command of command_type for the current stage and row.
+
+        :param command_type: The type of the command
+        :type command_type: str
+        :return: None
+        """
+        stage_record, row_record = self.current()
+        if stage_record is not None:
+            stage_record['commands'][command_type] += 1
+        if row_record is not None:
+            row_record['commands'][command_type] += 1
+
+    def summary(self):
+        """
+        Returns the total wall time and commands per stage name, in order of first use.
+
+        :return: dictionary of stage name to dictionary with keys calls, seconds and commands
+        :rtype: dict
+        """
+        totals = {}
+        for record in self.stages:
+            total = totals.setdefault(record['stage'], {'calls': 0, 'seconds': 0.0,
+                                                        'commands': collections.Counter()})
+            total['calls'] += 1
+            total['seconds'] += record['seconds']
+            total['commands'].update(record['commands'])
+
+        return totals
+
+    def write(self):
+        """
+        Writes the trace as JSON.
+
+        :return: None
+        """
+        trace = {'stages': self.stages, 'summary': self.summary()}
+        with open(self.trace_path, 'w') as trace_file:
+            json.dump(trace, trace_file, indent=2)
+
+    def print_summary(self):
+        """
+        Prints the summary as a table.
+
+        :return: None
+        """
+        command_types = sorted({command_type for total in self.summary().values() for command_type in total['commands']})
+        print("---------------------------------------------------------------")
+        print(f"{'stage':<24} {'calls':>5} {'seconds':>9} " + ' '.join(f'{name:>14}' for name in command_types))
+        for name, total in self.summary().items():
+            counts = ' '.join(f"{total['commands'][command_type]:>14}" for command_type in command_types)
+            print(f"{name:<24} {total['calls']:>5} {total['seconds']:>9.3f} {counts}")
+        print(f"Trace written to {self.trace_path}")
+
+
+def install_hooks():
+    """
+    Makes WebDriver.execute and ActionChains.perform report to the tracer. Every WebDriver command, including
+    those sent through WebElement, passes WebDriver.execute.
+
+    :return: None
+    """
+    from selenium.webdriver.remote.webdriver import WebDriver
+    from selenium.webdriver.common.action_chains import ActionChains
+
+    if getattr(WebDriver.execute, 'traced', False):
+        return
+
+    original_execute = WebDriver.execute
+    original_perform = ActionChains.perform
+
+    @functools.wraps(original_execute)
+    def execute(self, driver_command, params=None):
+        if TRACER is not None:
+            TRACER.count(COMMAND_TYPES.get(driver_command, driver_command))
+        return original_execute(self, driver_command, params)
+
+    @functools.wraps(original_perform)
+    def perform(self):
+        if TRACER is not None:
+            TRACER.count(PERFORM)
+        return original_perform(self)
+
+    execute.traced = True
+    WebDriver.execute = execute
+    ActionChains.perform = perform
+
+
+def enable_tracing(trace_path, webdriver_hooks=True):
+    """
+    Starts tracing if trace_path is given.
+
+    :param trace_path: The path to write the JSON trace to, None leaves tracing off
+    :type trace_path: str
+    :param webdriver_hooks: Whether to count WebDriver commands, which imports selenium
+    :type webdriver_hooks: bool
+    :return: The tracer, or None
+    :rtype: Tracer
+    """
+    global TRACER
+    if trace_path:
+        TRACER = Tracer(trace_path)
+        if webdriver_hooks:
+            install_hooks()
+
+    return TRACER
+
+
+def finish_tracing():
+    """
+    Writes the trace and prints the summary, if tracing is on.
+
+    :return: None
+    """
+    if TRACER is not None:
+        TRACER.write()
+        TRACER.print_summary()
+
+
+def trace_stage(name):
+    """
+    Returns a context manager that records the with-block as stage name, or does nothing when tracing is off.
+
+    :param name: The name of the stage
+    :type name: str
+    :return: The context manager
+    """
+    if TRACER is None:
+        return contextlib.nullcontext()
+
+    return TRACER.stage(name)
+
+
+def trace_row(index):
+    """
+    Returns a context manager that records the with-block as expense row index, or does nothing when tracing is off.
+
+    :param index: The index of the expense row
+    :type index: int
+    :return: The context manager
+    """
+    if TRACER is None:
+        return contextlib.nullcontext()
+
+    return TRACER.row(index)
+
+
+def traced(function):
+    """
+    Decorator that records every call of function as a stage named after it.
+
+    :param function: The stage function
+    :type function: callable
+    :return: The wrapped function
+    :rtype: callable
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with trace_stage(function.__name__):
+            return function(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,183 @@
+"""An append-only journal per declaration, so a submission that breaks off can be
+resumed from the first row that was not saved yet.
+
+Every line is a JSON record: a 'declaration' record with the reference set in
+fill_in_basics_sogeti when a submission starts, a 'row' record with the index and
+content hash of every row once it has been saved on the form, and a 'done' record
+at the end. Only the records after the last 'declaration' record count."""
+import datetime
+import json
+import os
+from submission_plan import row_digest
+
+JOURNAL_DIR = os.path.join(os.path.expanduser('~'), '.expense_automation', 'journal')
+
+"Number of rows after which a journaled submission saves the form and journals them"
+CHECKPOINT_ROWS = 25
+
+
+def journal_path(from_date, chunk=None, journal_dir=JOURNAL_DIR):
+    """
+    Returns the path of the journal of the declaration of a period, or of one chunk of it.
+
+    :param from_date: first date of the period
+    :type from_date: datetime
+    :param chunk: The number of the chunk, None for a period submitted as a single declaration
+    :type chunk: int
+    :param journal_dir: The directory of the journals
+    :type journal_dir: str
+    :return: The path of the journal
+    :rtype: str
+    """
+    name = from_date.strftime('%Y-%m') if chunk is None else f"{from_date.strftime('%Y-%m')}-{chunk}"
+
+    return os.path.join(journal_dir, name + '.jsonl')
+
+
+def chunk_journals(from_date, journal_dir=JOURNAL_DIR):
+    """
+    Returns the paths of the journals of the chunks of a period, see journal_path.
+
+    :param from_date: first date of the period
+    :type from_date: datetime
+    :param journal_dir: The directory of the journals
+    :type journal_dir: str
+    :return: The paths of the chunk journals that exist
+    :rtype: list
+    """
+    if not os.path.isdir(journal_dir):
+        return []
+    prefix = from_date.strftime('%Y-%m') + '-'
+
+    return sorted(os.path.join(journal_dir, name) for name in os.listdir(journal_dir)
+                  if name.startswith(prefix) and name.endswith('.jsonl') and name[len(prefix):-6].isdigit())
+
+
+def append_records(path, records):
+    """
+    Appends records to the journal and flushes them to disk. A torn last line left by a crash is ended first, so
+    the new records start on a line of their own.
+
+    :param path: The path of the journal
+    :type path: str
+    :param records: The records to append
+    :type records: list
+    :return: None
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    torn = os.path.exists(path) and not ends_with_newline(path)
+    with open(path, 'a') as journal_file:
+        if torn:
+            journal_file.write('\n')
+        for record in records:
+            journal_file.write(json.dumps(record) + '\n')
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+
+
+def ends_with_newline(path):
+    """
+    Returns whether the journal is empty or ends with a complete line.
+
+    :param path: The path of the journal
+    :type path: str
+    :return: Whether the last byte is a newline
+    :rtype: bool
+    """
+    with open(path, 'rb') as journal_file:
+        if journal_file.seek(0, os.SEEK_END) == 0:
+            return True
+        journal_file.seek(-1, os.SEEK_END)
+        return journal_file.read(1) == b'\n'
+
+
+def start_declaration(path, reference):
+    """
+    Records the start of a new submission of the declaration.
+
+    :param path: The path of the journal
+    :type path: str
+    :param reference: The 'Mijn referentie' of the declaration
+    :type reference: str
+    :return: None
+    """
+    append_records(path, [{'type': 'declaration', 'reference': reference,
+                           'started': datetime.datetime.now().isoformat(timespec='seconds')}])
+
+
+def confirm_rows(path, plan, indexes):
+    """
+    Records rows of the plan as saved on the form.
+
+    :param path: The path of the journal
+    :type path: str
+    :param plan: The submission plan
+    :type plan: tuple
+    :param indexes: The indexes of the saved rows
+    :type indexes: iterable
+    :return: None
+    """
+    append_records(path, [{'type': 'row', 'index': index, 'hash': row_digest(plan[index])} for index in indexes])
+
+
+def finish_declaration(path):
+    """
+    Records that every row of the declaration has been submitted.
+
+    :param path: The path of the journal
+    :type path: str
+    :return: None
+    """
+    append_records(path, [{'type': 'done'}])
+
+
+def read_journal(path):
+    """
+    Reads the journal of the last submission of the declaration. Lines that are not complete records, like a line
+    torn by a crash, are skipped.
+
+    :param path: The path of the journal
+    :type path: str
+    :return: dictionary with keys reference, confirmed (index to hash) and done
+    :rtype: dict
+    """
+    state = None
+    with open(path) as journal_file:
+        for line in journal_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record['type'] == 'declaration':
+                state = {'reference': record['reference'], 'confirmed': {}, 'done': False}
+            elif state is not None and record['type'] == 'row':
+                state['confirmed'][record['index']] = record['hash']
+            elif state is not None and record['type'] == 'done':
+                state['done'] = True
+
+    if state is None:
+        raise ValueError(f"No declaration found in journal {path}")
+
+    return state
+
+
+def first_unconfirmed(state, plan):
+    """
+    Returns the index of the first row of the plan that has not been saved yet, after checking that the saved rows
+    still match the plan.
+
+    :param state: The result of read_journal
+    :type state: dict
+    :param plan: The submission plan
+    :type plan: tuple
+    :return: The index of the first row to submit
+    :rtype: int
+    """
+    index = 0
+    while index in state['confirmed']:
+        if index >= len(plan) or state['confirmed'][index] != row_digest(plan[index]):
+            raise ValueError(f"Row {index} in the journal does not match the expense report, it has changed since "
+                             "the submission started")
+        index += 1
+
+    return index
@@ -0,0 +1,119 @@
+"""Fetches NS expense reports over HTTP instead of through the browser: the
+session cookies of a single browser login are copied into a pooled
+requests.Session, and the reistransacties export of any period is requested
+directly, several periods at a time.
+
+The export URL can be overridden with the NS_EXPORT_URL environment variable,
+e.g. to point it at the stand-in server."""
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from download_watcher import DOWNLOAD_DIR, EXPORT_PREFIX, PARTIAL_SUFFIX
+
+NS_EXPORT_URL = os.environ.get('NS_EXPORT_URL', 'https://www.ns.nl/mijnnszakelijk/reistransacties/export')
+NS_DATE_FORMAT = '%d-%m-%Y'
+FILENAME_REGEX = re.compile(r'filename="?(?P<file_name>[^";]+)"?')
+
+"Number of periods fetched at the same time, every one of them keeps a connection in the pool"
+FETCH_WORKERS = 4
+
+
+def session_from_browser(browser_ns, pool_size=FETCH_WORKERS):
+    """
+    Returns an HTTP session with the cookies and user agent of the browser where the user is logged in to NS.
+
+    :param browser_ns: The browser where the user is logged in to NS webpage
+    :type browser_ns: WebDriver
+    :param pool_size: The number of connections to keep per host
+    :type pool_size: int
+    :return: The session
+    :rtype: Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = browser_ns.execute_script('return navigator.userAgent')
+    for cookie in browser_ns.get_cookies():
+        session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+    return session
+
+
+def export_file_name(response, from_date, until_date):
+    """
+    Returns the file name to save an export under: the name the server gives it, with the period appended so the
+    exports of different periods never overwrite each other.
+
+    :param response: The response of the export request
+    :type response: Response
+    :param from_date: The first date of the period
+    :type from_date: datetime
+    :param until_date: The last date of the period
+    :type until_date: datetime
+    :return: The file name
+    :rtype: str
+    """
+    match = FILENAME_REGEX.search(response.headers.get('Content-Disposition', ''))
+    stem = os.path.splitext(match.group('file_name'))[0] if match else EXPORT_PREFIX.rstrip('-')
+    if not stem.startswith(EXPORT_PREFIX.rstrip('-')):
+        stem = EXPORT_PREFIX + stem
+
+    return f"{stem}-{from_date.strftime('%Y%m%d')}-{until_date.strftime('%Y%m%d')}.xls"
+
+
+def fetch_export(session, from_date, until_date, directory=DOWNLOAD_DIR, export_url=None, timeout=60):
+    """
+    Requests the export of a period and saves it in directory.
+
+    :param session: The session with the NS cookies
+    :type session: Session
+    :param from_date: The first date of the period
+    :type from_date: datetime
+    :param until_date: The last date of the period
+    :type until_date: datetime
+    :param directory: The directory to save the export in
+    :type directory: str
+    :param export_url: The URL of the export, NS_EXPORT_URL when None
+    :type export_url: str
+    :param timeout: The timeout of the request in seconds
+    :type timeout: float
+    :return: The path of the saved excel file
+    :rtype: str
+    """
+    response = session.get(export_url or NS_EXPORT_URL, timeout=timeout,
+                           params={'fromDate': from_date.strftime(NS_DATE_FORMAT),
+                                   'untilDate': until_date.strftime(NS_DATE_FORMAT)})
+    response.raise_for_status()
+    if response.headers.get('Content-Type', '').startswith('text/html'):
+        raise ValueError(f"NS returned a web page instead of the export of {from_date.strftime('%B %Y')}, "
+                         "the session has probably expired")
+
+    "Write under the partial suffix first, so latest_export never picks up a half written file"
+    export_path = os.path.join(directory, export_file_name(response, from_date, until_date))
+    with open(export_path + PARTIAL_SUFFIX, 'wb') as export_file:
+        export_file.write(response.content)
+    os.replace(export_path + PARTIAL_SUFFIX, export_path)
+
+    return export_path
+
+
+def fetch_exports(session, periods, directory=DOWNLOAD_DIR, workers=FETCH_WORKERS):
+    """
+    Fetches the exports of several periods concurrently.
+
+    :param session: The session with the NS cookies
+    :type session: Session
+    :param periods: tuples (from_date, until_date)
+    :type periods: list
+    :param directory: The directory to save the exports in
+    :type directory: str
+    :param workers: The number of periods to fetch at the same time
+    :type workers: int
+    :return: The paths of the saved excel files, in the order of periods
+    :rtype: list
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ns-export') as executor:
+        return list(executor.map(lambda period: fetch_export(session, *period, directory), periods))
@@ -0,0 +1,227 @@
+"""A streaming alternative to the read_in_df, filter_out_zero, loop_through_df
+flow: generator stages that pass one record at a time.
+
+    source -> in_date_order -> drop_zero -> enrich -> sink
+
+A source yields Transaction records (an NS export, an OV-chipkaart CSV), enrich
+turns them into the FormRow records of submission_plan, and a sink consumes
+them (the Einstein form, or a CSV file for a dry run). buffered runs a stage in
+a background thread with a bounded queue, so a slow sink can start on the first
+row while the source is still reading."""
+import collections
+import csv
+import datetime
+import heapq
+import itertools
+import queue
+import threading
+from halte_parser import return_van_naar
+from reconciliation import DATUM_FORMAT
+from submission_plan import FormRow
+
+Transaction = collections.namedtuple('Transaction', ['datum', 'omschrijving', 'cents'])
+
+"Rows held by buffered at most"
+BUFFER_ROWS = 64
+
+"Rows in_date_order may hold back: none for sources that are already in date order, like an NS export"
+REORDER_ROWS = 0
+
+"The OV-chipkaart CSV is not guaranteed to be in date order, this holds a busy month of rides"
+OV_REORDER_ROWS = 1000
+
+"Columns of the transaction overview CSV of ov-chipkaart.nl"
+OV_DATUM = 'Datum'
+OV_VERTREK = 'Vertrek'
+OV_BESTEMMING = 'Bestemming'
+OV_BEDRAG = 'Bedrag'
+OV_DELIMITER = ';'
+
+_DONE = object()
+
+
+def ns_export_source(export_path):
+    """
+    Yields the transactions of an NS export. The export is read in as a whole through load_expenses, which also uses
+    the cache, as the excel reader cannot stream.
+
+    :param export_path: The path of the excel file
+    :type export_path: str
+    :return: generator of Transaction
+    :rtype: generator
+    """
+    from expense_report import load_expenses
+    from reconciliation import PRICE_CENTS_COLUMN
+
+    df = load_expenses(export_path)
+    for datum, omschrijving, cents in zip(df['Datum'].tolist(), df['Omschrijving'].tolist(),
+                                          df[PRICE_CENTS_COLUMN].tolist()):
+        yield Transaction(datum.date(), omschrijving, cents)
+
+
+def ovchipkaart_source(csv_path):
+    """
+    Yields the transactions of an OV-chipkaart CSV one line at a time. The description is written like an NS
+    check-in/check-uit line, so enrich finds the route the same way.
+
+    :param csv_path: The path of the CSV file
+    :type csv_path: str
+    :return: generator of Transaction
+    :rtype: generator
+    """
+    with open(csv_path, newline='', encoding='utf-8-sig') as csv_file:
+        for line in csv.DictReader(csv_file, delimiter=OV_DELIMITER):
+            bedrag = (line.get(OV_BEDRAG) or '0').replace('.', '').replace(',', '.')
+            yield Transaction(datetime.datetime.strptime(line[OV_DATUM], DATUM_FORMAT).date(),
+                              f"Check-in/Check-uit: {line.get(OV_VERTREK, '')} - {line.get(OV_BESTEMMING, '')}",
+                              int(round(float(bedrag) * 100)))
+
+
+def buffered(records, size=BUFFER_ROWS):
+    """
+    Yields the records of a stage that runs in a background thread, holding at most size records in between.
+
+    :param records: The records of the stage
+    :type records: iterable
+    :param size: The maximum number of records in the queue
+    :type size: int
+    :return: generator of the records
+    :rtype: generator
+    """
+    records_queue = queue.Queue(maxsize=size)
+    stop = threading.Event()
+
+    def put(record):
+        "Gives up once the consumer has stopped, so the thread never blocks on a full queue"
+        while not stop.is_set():
+            try:
+                records_queue.put(record, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for record in records:
+                if not put(record):
+                    return
+            put(_DONE)
+        except BaseException as error:  # re-raised in the consuming thread
+            put(error)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            record = records_queue.get()
+            if record is _DONE:
+                return
+            if isinstance(record, BaseException):
+                raise record
+            yield record
+    finally:
+        stop.set()
+
+
+def in_date_order(transactions, window=REORDER_ROWS):
+    """
+    Yields the transactions sorted on date, keeping the order of the source within a day, with a reorder buffer of
+    at most window transactions.
+
+    :param transactions: The transactions
+    :type transactions: iterable
+    :param window: The maximum number of transactions held back
+    :type window: int
+    :return: generator of Transaction
+    :rtype: generator
+    """
+    heap = []
+    last_datum = None
+    for position, transaction in enumerate(itertools.chain(transactions, [None])):
+        if transaction is not None:
+            heapq.heappush(heap, (transaction.datum, position, transaction))
+        "Release the earliest transaction once the window is full, and all of them at the end"
+        while heap and (len(heap) > window or transaction is None):
+            datum, _, earliest = heapq.heappop(heap)
+            if last_datum is not None and datum < last_datum:
+                raise ValueError(f"A transaction of {datum} comes more than {window} rows after later ones, "
+                                 "reorder with a larger window")
+            last_datum = datum
+            yield earliest
+
+
+def drop_zero(transactions):
+    """
+    Skips the transactions without a price, like filter_out_zero.
+
+    :param transactions: The transactions
+    :type transactions: iterable
+    :return: generator of Transaction
+    :rtype: generator
+    """
+    return (transaction for transaction in transactions if transaction.cents != 0)
+
+
+def enrich(transactions, totals=None):
+    """
+    Turns the transactions into form rows with the route and the ride number, like compile_plan.
+
+    :param transactions: The transactions, sorted on date
+    :type transactions: iterable
+    :param totals: Counter that gets the number of rows and their cents added, if given
+    :type totals: Counter
+    :return: generator of FormRow
+    :rtype: generator
+    """
+    previous_datum = None
+    rit_nummer = 0
+    for index, transaction in enumerate(transactions):
+        rit_nummer = rit_nummer + 1 if transaction.datum == previous_datum else 1
+        previous_datum = transaction.datum
+        if totals is not None:
+            totals['rows'] += 1
+            totals['cents'] += transaction.cents
+        van_halte, naar_halte = return_van_naar(transaction.omschrijving)
+        yield FormRow(f'{index + 1 if index else 0}_2', transaction.datum.strftime(DATUM_FORMAT), rit_nummer,
+                      str(transaction.cents / 100), van_halte, naar_halte)
+
+
+def form_rows(source, totals=None, buffer_rows=BUFFER_ROWS, window=REORDER_ROWS):
+    """
+    Chains the stages from a source to the form rows, with the source running ahead in a background thread.
+
+    :param source: The transactions of a source, e.g. ns_export_source or ovchipkaart_source
+    :type source: iterable
+    :param totals: Counter that gets the number of rows and their cents added, if given
+    :type totals: Counter
+    :param buffer_rows: The maximum number of transactions the source runs ahead
+    :type buffer_rows: int
+    :param window: The reorder window of in_date_order
+    :type window: int
+    :return: generator of FormRow
+    :rtype: generator
+    """
+    return enrich(drop_zero(in_date_order(buffered(source, buffer_rows), window)), totals)
+
+
+def csv_sink(rows, csv_path):
+    """
+    Writes the form rows to a CSV file instead of the form, for a dry run.
+
+    :param rows: The form rows
+    :type rows: iterable
+    :param csv_path: The path of the CSV file
+    :type csv_path: str
+    :return: The number of written rows
+    :rtype: int
+    """
+    written = 0
+    with open(csv_path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(FormRow._fields)
+        for form_row in rows:
+            writer.writerow(form_row)
+            written += 1
+
+    return written
@@ -0,0 +1,181 @@
+"""Reconciles the amount the user entered with the expense report in integer
+cents, with subtotals per day and per route, and finds the rows that explain a
+difference."""
+import pandas as pd
+from halte_parser import parse_van_naar
+
+PRICE_COLUMN = 'Prijs (incl. btw)'
+DATUM_FORMAT = '%d-%m-%Y'
+
+"The card number of every transaction, not in every export"
+CARD_COLUMN = 'Kaartnummer'
+
+"read_in_df replaces the price in euros with this column of integer cents"
+PRICE_CENTS_COLUMN = 'Prijs (cent)'
+
+"Searching for three rows is quadratic, so it is skipped for larger reports"
+MAX_ROWS_FOR_TRIPLES = 1000
+
+
+def to_cents(prices):
+    """
+    Converts prices in euros to integer cents.
+
+    :param prices: The prices in euros
+    :type prices: Series
+    :return: The prices in cents
+    :rtype: Series
+    """
+    return (prices.astype(float) * 100).round().astype('int64')
+
+
+def amount_to_cents(amount):
+    """
+    Converts a single amount in euros to integer cents.
+
+    :param amount: The amount in euros
+    :type amount: float
+    :return: The amount in cents
+    :rtype: int
+    """
+    return int(round(amount * 100))
+
+
+def find_candidates(cents, target, max_rows_for_triples=MAX_ROWS_FOR_TRIPLES):
+    """
+    Returns the smallest set of rows, of at most three, whose prices add up to target.
+
+    :param cents: The prices in cents, indexed like the dataframe containing the expenses
+    :type cents: Series
+    :param target: The amount in cents to explain
+    :type target: int
+    :param max_rows_for_triples: The maximum number of rows for which sets of three rows are searched
+    :type max_rows_for_triples: int
+    :return: The index labels of the rows, empty when no set is found
+    :rtype: list
+    """
+    labels = cents.index.tolist()
+    values = cents.tolist()
+
+    "One row: a hash lookup"
+    first_position = {}
+    for position, value in enumerate(values):
+        first_position.setdefault(value, position)
+    if target in first_position:
+        return [labels[first_position[target]]]
+
+    def find_pair(remainder, start):
+        seen = {}
+        for position in range(start, len(values)):
+            if remainder - values[position] in seen:
+                return [seen[remainder - values[position]], position]
+            seen.setdefault(values[position], position)
+        return None
+
+    "Two rows: one pass with a hash of the prices seen so far"
+    pair = find_pair(target, 0)
+    if pair:
+        return [labels[position] for position in pair]
+
+    "Three rows: a pair search after every row"
+    if len(values) <= max_rows_for_triples:
+        for position, value in enumerate(values):
+            pair = find_pair(target - value, position + 1)
+            if pair:
+                return [labels[position]] + [labels[pair_position] for pair_position in pair]
+
+    return []
+
+
+def reconcile(df, input_amount):
+    """
+    Compares the input amount with the expense report in integer cents.
+
+    :param df: The cleaned dataframe containing the expenses
+    :type df: dataframe
+    :param input_amount: The input amount from user
+    :type input_amount: float
+    :return: dictionary with keys input_cents, total_cents, difference_cents (total minus input), per_day and
+        per_route (Series of cents) and candidates (index labels of the rows that explain a positive difference)
+    :rtype: dict
+    """
+    cents = df[PRICE_CENTS_COLUMN]
+    routes = parse_van_naar(df['Omschrijving'])
+
+    "One group-by pass on day and route; the per-day and per-route subtotals are rolled up from its result"
+    subtotals = pd.DataFrame({'Datum': df['Datum'], 'van_halte': routes['van_halte'],
+                              'naar_halte': routes['naar_halte'], 'cents': cents}) \
+        .groupby(['Datum', 'van_halte', 'naar_halte'], sort=False, dropna=False)['cents'].sum()
+    per_day = subtotals.groupby(level='Datum', sort=False, dropna=False).sum()
+    per_route = subtotals.groupby(level=['van_halte', 'naar_halte'], dropna=False).sum().sort_values(ascending=False)
+
+    input_cents = amount_to_cents(input_amount)
+    total_cents = int(cents.sum())
+    difference_cents = total_cents - input_cents
+    candidates = find_candidates(cents, difference_cents) if difference_cents > 0 else []
+
+    return {'input_cents': input_cents, 'total_cents': total_cents, 'difference_cents': difference_cents,
+            'per_day': per_day, 'per_route': per_route, 'candidates': candidates}
+
+
+def chunk_amounts(chunks, amount):
+    """
+    Returns the amount of every chunk in cents, after checking that they add up to the amount checked by
+    check_amount. When the user continued past a mismatch they don't, and the chunks would declare another total
+    than a single declaration.
+
+    :param chunks: The cleaned dataframes of the chunks of the expenses
+    :type chunks: list
+    :param amount: The input amount from user
+    :type amount: float
+    :return: The amounts of the chunks in cents
+    :rtype: list
+    """
+    amounts = [int(chunk[PRICE_CENTS_COLUMN].sum()) for chunk in chunks]
+    input_cents = amount_to_cents(amount)
+    if sum(amounts) != input_cents:
+        raise ValueError(f"The chunks add up to {format_cents(sum(amounts))} instead of the input amount "
+                         f"{format_cents(input_cents)}, a period that doesn't match can't be split")
+
+    return amounts
+
+
+def format_cents(cents):
+    """
+    Formats an amount in cents as euros.
+
+    :param cents: The amount in cents
+    :type cents: int
+    :return: The amount like 12.34 or -0.05
+    :rtype: str
+    """
+    sign = '-' if cents < 0 else ''
+
+    return f'{sign}{abs(cents) // 100}.{abs(cents) % 100:02d}'
+
+
+def print_mismatch(df, reconciliation):
+    """
+    Prints the per-day subtotals and the rows that explain the difference.
+
+    :param df: The cleaned dataframe containing the expenses
+    :type df: dataframe
+    :param reconciliation: The result of reconcile
+    :type reconciliation: dict
+    :return: None
+    """
+    print("Subtotals per day:")
+    for datum, cents in reconciliation['per_day'].items():
+        print(f"  {datum.strftime(DATUM_FORMAT)}: {format_cents(cents)}")
+
+    difference_cents = reconciliation['difference_cents']
+    if difference_cents < 0:
+        print(f"The expense report is {format_cents(-difference_cents)} short, some expenses are missing from it")
+    elif reconciliation['candidates']:
+        print(f"These rows add up to the difference of {format_cents(difference_cents)}:")
+        for label in reconciliation['candidates']:
+            row = df.loc[label]
+            print(f"  row {label}: {row['Datum'].strftime(DATUM_FORMAT)}  {row['Omschrijving']}  "
+                  f"{format_cents(row[PRICE_CENTS_COLUMN])}")
+    else:
+        print(f"No set of up to three rows adds up to the difference of {format_cents(difference_cents)}")
@@ -0,0 +1,324 @@
+#! python3
+"""A local stand-in for Einstein.sogeti.nl and the NS zakelijk webpage.
+
+Serves the same DOM as the real sites as far as this program relies on it: the
+menus, the iframe at node-34, the 'Reiskosten YP' select, verderButton, bvzm,
+the N_2 expense rows, the add-row and OpslaanControle buttons and the regelcheck
+checkboxes, and on the NS side 'Gemaakte reizen', the date fields and the export
+download, which needs the session cookie set by the login page and a fromDate
+and untilDate. Every OpslaanControle is stored in StandInServer.submissions and
+the period of every export request in StandInServer.export_periods.
+
+Point the program at it with the EINSTEIN_URL, NS_LOGIN_URL and NS_EXPORT_URL
+environment variables, e.g. EINSTEIN_URL=http://127.0.0.1:8000/"""
+import argparse
+import os
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+MENU = """
+<div id="block-menu-block-2"><div><div><ul>
+  <li><a href="/">Home</a></li>
+  <li><a href="/mijn-sogeti">Mijn Sogeti</a></li>
+</ul></div></div></div>
+<div id="block-menu-block-5"><div><div><ul>
+  <li><a href="/mijn-sogeti">Nieuws</a></li>
+  <li><a href="/mijn-sogeti">Agenda</a></li>
+  <li><a href="/mijn-sogeti">Uren</a></li>
+  <li><a href="/mijn-sogeti">Verlof</a></li>
+  <li><a href="/mijn-sogeti">Declaraties</a>
+    <ul><li><a href="/mijn-declaratie">mijnDeclaratie</a></li></ul>
+  </li>
+</ul></div></div></div>
+"""
+
+EINSTEIN_HOME = f"""<html><head><title>Einstein</title></head><body>{MENU}</body></html>"""
+
+MIJN_DECLARATIE = f"""<html><head><title>mijnDeclaratie</title></head><body>{MENU}
+<div id="node-34"><div><div><div><div>
+  <iframe src="/declaratie/start" width="1200" height="800"></iframe>
+</div></div></div></div></div>
+</body></html>"""
+
+DECLARATIE_START = """<html><body><form action="/declaratie/basis" method="get"><table><tbody>
+<tr><td>Nieuwe declaratie</td></tr>
+<tr><td>Medewerker</td></tr>
+<tr><td>Soort declaratie</td></tr>
+<tr><td><select name="soort">
+  <option>Kies een soort</option><option>Reiskosten YP</option><option>Overige kosten</option>
+</select></td></tr>
+<tr><td><input type="submit" id="verderButton" value="Verder"></td></tr>
+</tbody></table></form></body></html>"""
+
+DECLARATIE_BASIS = """<html><body><form action="/declaratie/regels" method="get"><table><tbody>
+<tr><td>Soort</td><td>Reiskosten YP</td></tr>
+<tr><td>Medewerker</td><td>Stand-in</td></tr>
+<tr><td>Afdeling</td><td>Stand-in</td></tr>
+<tr><td>Kostenplaats</td><td>0000</td></tr>
+<tr><td>Project</td><td>-</td></tr>
+<tr><td>Status</td><td>Nieuw</td></tr>
+<tr><td>Datum</td><td>-</td></tr>
+<tr><td>Mijn referentie</td><td><input name="referentie"></td></tr>
+<tr><td>Valuta</td><td>EUR</td></tr>
+<tr><td>Bedrag</td><td><input name="bedrag"></td></tr>
+<tr><td colspan="2"><input type="submit" id="bvzm" value="Vervolg declaratie"></td></tr>
+</tbody></table></form></body></html>"""
+
+"Row k of the grid is named 0_* for k == 0 and (k + 1)_* after that, like on Einstein"
+DECLARATIE_REGELS = """<html><head><script>
+function rowLabel(position) { return position === 0 ? 0 : position + 1; }
+function rowHtml(position) {
+    var label = rowLabel(position);
+    return '<td><input type="checkbox" checked id="regelcheck' + (position + 1) + '"></td>' +
+        '<td><input name="' + label + '_2"></td><td><input name="' + label + '_3"></td>' +
+        '<td><input name="' + label + '_4"></td>' +
+        '<td><select name="' + label + '_5"><option>OV</option><option>Taxi</option></select></td>' +
+        '<td><input name="' + label + '_6"></td><td><input name="' + label + '_7"></td>';
+}
+function addRow() {
+    var body = document.getElementById('regels');
+    var row = document.createElement('tr');
+    row.innerHTML = rowHtml(body.rows.length);
+    body.appendChild(row);
+}
+function opslaanControle() {
+    var request = new XMLHttpRequest();
+    request.open('POST', '/declaratie/opslaan', false);
+    request.setRequestHeader('Content-Type', 'application/x-www-form-urlencoded');
+    request.send(new URLSearchParams(new FormData(document.forms[0])).toString());
+}
+</script></head><body onload="addRow()"><form>
+<table><tbody><tr>
+  <td>Maand</td><td><input id="decHeadings[0].decHeadingsValue" name="maand"></td>
+  <td>Jaar</td><td><input name="jaar"></td>
+  <td>Soort</td><td><input name="soortreis"></td>
+</tr></tbody></table>
+<table><tbody id="regels"></tbody></table>
+<table><tbody>
+<tr><td>Acties</td></tr>
+<tr><td><input type="button" class="button" value="Voeg lege regel toe" onclick="addRow()"><span></span><span></span><span></span><span></span><span></span><span></span><span></span><span></span><span></span><span></span><span></span><input type="button" value="OpslaanControle" onclick="opslaanControle()"></td></tr>
+</tbody></table>
+</form></body></html>"""
+
+NS_LOGIN = """<html><head><title>Mijn NS Zakelijk</title></head><body><main>
+<a id="menuitem.label.hybristravelhistory" href="/mijnnszakelijk/reizen">Gemaakte reizen</a>
+</main></body></html>"""
+
+"Zoeken points Download Excel at the export of the period in the date fields, the until date typed as ddmmyyyy"
+NS_REIZEN = """<html><head><title>Gemaakte reizen</title><script>
+function zoeken() {
+    var value = function (id) { return document.getElementById(id).value; };
+    var until = value('untilField').replace(/\\D/g, '');
+    var fromDate = [value('dayField'), value('monthField'), value('yearField')].join('-');
+    var untilDate = [until.slice(0, 2), until.slice(2, 4), until.slice(4)].join('-');
+    document.getElementById('download').href = '/mijnnszakelijk/export?' +
+        new URLSearchParams({fromDate: fromDate, untilDate: untilDate}).toString();
+    document.getElementById('ns-app').style.display = 'block';
+}
+</script></head><body>
+<main><div><div><div><div><div>
+  <div></div>
+  <div><div></div><div><div><form>
+    <input id="dayField"><input id="monthField"><input id="yearField">
+    <span tabindex="0">t/m</span><input id="untilField">
+    <p><a href="#" onclick="zoeken(); return false"><span>Zoeken</span></a></p>
+  </form></div></div></div>
+</div></div></div></div></div></main>
+<div id="ns-app" style="display: none"><div class="col-3b"><div class="title box"><ul>
+  <li><a id="download" href="/mijnnszakelijk/export">Download Excel</a></li>
+</ul></div></div></div>
+</body></html>"""
+
+NS_SESSION_COOKIE = 'NS_SESSION'
+NS_DATE_FORMAT = '%d-%m-%Y'
+
+PAGES = {
+    '/': EINSTEIN_HOME,
+    '/mijn-sogeti': EINSTEIN_HOME,
+    '/mijn-declaratie': MIJN_DECLARATIE,
+    '/declaratie/start': DECLARATIE_START,
+    '/declaratie/basis': DECLARATIE_BASIS,
+    '/declaratie/regels': DECLARATIE_REGELS,
+    '/mijnnszakelijk/login': NS_LOGIN,
+    '/mijnnszakelijk/reizen': NS_REIZEN,
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves the pages of the stand-in server"""
+
+    def log_message(self, format, *args):
+        """Keeps the console quiet"""
+
+    def send_body(self, body, content_type='text/html; charset=utf-8', headers=None):
+        """
+        Sends a 200 response.
+
+        :param body: The response body
+        :type body: bytes
+        :param content_type: The Content-Type header
+        :type content_type: str
+        :param headers: Extra headers
+        :type headers: dict
+        :return: None
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def export_period(self, query):
+        """
+        Returns the period of an export request.
+
+        :param query: The query string of the request
+        :type query: str
+        :return: tuple (from_date, until_date), or None when either is missing, not a dd-mm-yyyy date or the
+            period ends before it starts
+        :rtype: tuple
+        """
+        params = dict(parse_qsl(query))
+        try:
+            from_date = datetime.strptime(params['fromDate'], NS_DATE_FORMAT)
+            until_date = datetime.strptime(params['untilDate'], NS_DATE_FORMAT)
+        except (KeyError, ValueError):
+            return None
+
+        return (from_date, until_date) if from_date <= until_date else None
+
+    def do_GET(self):
+        """
+        Serves a page or the configured NS export, which needs the session cookie set by the NS login page and a
+        valid fromDate and untilDate
+        """
+        url = urlsplit(self.path)
+        path = url.path
+        if path == '/mijnnszakelijk/export' and self.server.export_path:
+            if f'{NS_SESSION_COOKIE}=' not in self.headers.get('Cookie', ''):
+                self.send_error(403)
+                return
+            period = self.export_period(url.query)
+            if period is None:
+                self.send_error(400, 'Expected fromDate and untilDate as dd-mm-yyyy')
+                return
+            with self.server.lock:
+                self.server.export_periods.append(period)
+            with open(self.server.export_path, 'rb') as export_file:
+                body = export_file.read()
+            file_name = os.path.basename(self.server.export_path)
+            if not file_name.startswith('reistransacties-'):
+                file_name = 'reistransacties-' + file_name
+            self.send_body(body, 'application/vnd.ms-excel',
+                           {'Content-Disposition': f'attachment; filename="{file_name}"'})
+        elif path == '/mijnnszakelijk/login':
+            self.send_body(NS_LOGIN.encode('utf-8'), headers={'Set-Cookie': f'{NS_SESSION_COOKIE}=standin; Path=/'})
+        elif path in PAGES:
+            self.send_body(PAGES[path].encode('utf-8'))
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        """Stores an OpslaanControle submission"""
+        if urlsplit(self.path).path != '/declaratie/opslaan':
+            self.send_error(404)
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        fields = dict(parse_qsl(self.rfile.read(length).decode('utf-8'), keep_blank_values=True))
+        with self.server.lock:
+            self.server.submissions.append(fields)
+        self.send_body(b'ok', 'text/plain')
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    The stand-in server, listening on 127.0.0.1. Use port 0 to get a free port.
+
+    :param port: The port to listen on
+    :type port: int
+    :param export_path: The excel file to serve as NS export
+    :type export_path: str
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, export_path=None):
+        super().__init__(('127.0.0.1', port), StandInHandler)
+        self.export_path = export_path
+        self.submissions = []
+        self.export_periods = []
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def einstein_url(self):
+        """The URL to use as EINSTEIN_URL"""
+        return f'http://127.0.0.1:{self.server_address[1]}/'
+
+    @property
+    def ns_login_url(self):
+        """The URL to use as NS_LOGIN_URL"""
+        return f'http://127.0.0.1:{self.server_address[1]}/mijnnszakelijk/login?0'
+
+    @property
+    def ns_export_url(self):
+        """The URL to use as NS_EXPORT_URL"""
+        return f'http://127.0.0.1:{self.server_address[1]}/mijnnszakelijk/export'
+
+    def start(self):
+        """
+        Starts serving in a background thread.
+
+        :return: The server itself
+        :rtype: StandInServer
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        """
+        Stops serving and closes the socket.
+
+        :return: None
+        """
+        self.shutdown()
+        self.server_close()
+
+
+def filled_rows(submission):
+    """
+    Returns the number of expense rows with a datum in a submission.
+
+    :param submission: The submitted form fields
+    :type submission: dict
+    :return: The number of filled in rows
+    :rtype: int
+    """
+    return sum(1 for name, value in submission.items() if name.endswith('_2') and name[:-2].isdigit() and value)
+
+
+def main():
+    """This is the main function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--export', help='excel file to serve as NS export')
+    args = parser.parse_args()
+
+    server = StandInServer(args.port, args.export)
+    print(f"Einstein stand-in: {server.einstein_url}\n"
+          f"NS stand-in: {server.ns_login_url}\n"
+          f"NS export stand-in: {server.ns_export_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
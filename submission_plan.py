@@ -0,0 +1,119 @@
+"""Compiles the cleaned dataframe into a submission plan: an immutable tuple with
+one FormRow per row of the Einstein expense form. All values are worked out with
+column operations up front, so the browser loop only has to replay the plan."""
+import collections
+import hashlib
+import numpy as np
+from halte_parser import parse_van_naar
+from reconciliation import DATUM_FORMAT, PRICE_CENTS_COLUMN
+
+"A namedtuple has no per-instance __dict__, so a plan of many rows stays compact"
+FormRow = collections.namedtuple('FormRow', ['element_name', 'datum', 'rit_nummer', 'ov_bedrag',
+                                             'van_halte', 'naar_halte'])
+
+
+def element_names(rows):
+    """
+    Returns the names of the datum fields of the first rows rows on the form: 0_2 for the first row and
+    (position + 1)_2 for the others.
+
+    :param rows: The number of rows
+    :type rows: int
+    :return: The element names
+    :rtype: list
+    """
+    labels = np.arange(rows) + 1
+    if rows:
+        labels[0] = 0
+
+    return [f'{label}_2' for label in labels]
+
+
+def ride_numbers(datum):
+    """
+    Returns the ritnummer of every row: counting from 1, and starting again wherever Datum differs from the
+    previous row.
+
+    :param datum: The 'Datum' column of the dataframe containing the expenses
+    :type datum: Series
+    :return: The ride numbers
+    :rtype: Series
+    """
+    new_day = datum.ne(datum.shift())
+
+    return datum.groupby(new_day.cumsum().values).cumcount().values + 1
+
+
+def compile_plan(df):
+    """
+    Turns the cleaned dataframe into the submission plan.
+
+    :param df: The cleaned dataframe containing the expenses
+    :type df: dataframe
+    :return: One FormRow per expense row, in the order of df
+    :rtype: tuple
+    """
+    routes = parse_van_naar(df['Omschrijving'])
+    "The form gets the dates as written in the export and the prices in euros"
+    columns = zip(element_names(len(df)),
+                  df['Datum'].dt.strftime(DATUM_FORMAT).tolist(),
+                  ride_numbers(df['Datum']).tolist(),
+                  (df[PRICE_CENTS_COLUMN] / 100).astype(str).tolist(),
+                  routes['van_halte'].tolist(),
+                  routes['naar_halte'].tolist())
+
+    return tuple(FormRow._make(values) for values in columns)
+
+
+def chunk_bounds(datum, max_rows):
+    """
+    Returns the positions where the expenses are split into chunks of at most max_rows rows. A chunk ends at the
+    last start of a day that fits, so the rides of a day stay in one declaration unless the day alone is too long.
+
+    :param datum: The 'Datum' column of the dataframe containing the expenses, sorted
+    :type datum: Series
+    :param max_rows: The maximum number of rows per chunk
+    :type max_rows: int
+    :return: The start positions of the chunks followed by the number of rows
+    :rtype: list
+    """
+    if max_rows < 1:
+        raise ValueError(f"A chunk needs at least 1 row, got max_rows={max_rows}")
+    rows = len(datum)
+    day_starts = np.flatnonzero(datum.ne(datum.shift()).to_numpy())
+    bounds = [0]
+    while rows - bounds[-1] > max_rows:
+        limit = bounds[-1] + max_rows
+        last_day_start = day_starts[np.searchsorted(day_starts, limit, side='right') - 1]
+        bounds.append(int(last_day_start) if last_day_start > bounds[-1] else limit)
+    bounds.append(rows)
+
+    return bounds
+
+
+def split_chunks(df, max_rows):
+    """
+    Splits the expenses into chunks of at most max_rows rows, see chunk_bounds.
+
+    :param df: The cleaned dataframe containing the expenses
+    :type df: dataframe
+    :param max_rows: The maximum number of rows per chunk
+    :type max_rows: int
+    :return: The cleaned dataframes of the chunks
+    :rtype: list
+    """
+    bounds = chunk_bounds(df['Datum'], max_rows)
+
+    return [df.iloc[start:end].reset_index(drop=True) for start, end in zip(bounds, bounds[1:])]
+
+
+def row_digest(form_row):
+    """
+    Returns a content hash of a form row.
+
+    :param form_row: The form row
+    :type form_row: FormRow
+    :return: The sha256 of the values of the row
+    :rtype: str
+    """
+    return hashlib.sha256('\x1f'.join(str(value) for value in form_row).encode('utf-8')).hexdigest()
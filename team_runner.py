@@ -0,0 +1,188 @@
+#! python3
+"""Submits the public transport expenses of a whole team on Einstein.sogeti.nl.
+
+Reads a manifest CSV with the columns user, export, year, month, amount and
+optionally profile_dir, and runs fill_in_basics_sogeti and loop_through_df for
+every line on a bounded pool of headless Chrome workers. profile_dir is a Chrome
+user data directory in which that user is already logged in to Einstein."""
+import argparse
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import declaratie_sogeti_2 as declaratie
+from cli import positive_int
+from expense_report import define_period, load_expenses
+from reconciliation import PRICE_CENTS_COLUMN, amount_to_cents, format_cents
+
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 2
+
+
+class SubmissionStarted(Exception):
+    """A submission failed after the declaration was started, so another attempt could submit it twice"""
+
+
+def read_manifest(manifest_path):
+    """
+    Reads in the manifest and returns one dictionary per line.
+
+    :param manifest_path: The path of the manifest CSV
+    :type manifest_path: str
+    :return: The manifest entries with keys user, export, year, month, amount and profile_dir
+    :rtype: list
+    """
+    entries = []
+    with open(manifest_path, newline='') as manifest_file:
+        for line in csv.DictReader(manifest_file):
+            entries.append({
+                'user': line['user'],
+                'export': line['export'],
+                'year': int(line['year']),
+                'month': int(line['month']),
+                'amount': float(line['amount']),
+                'profile_dir': line.get('profile_dir') or None,
+            })
+
+    return entries
+
+
+def submit_entry(entry, df, from_date, headless=True):
+    """
+    Submits the declaration of one manifest entry in a new browser. Failures after the declaration has been
+    started are raised as SubmissionStarted.
+
+    :param entry: The manifest entry
+    :type entry: dict
+    :param df: The cleaned dataframe containing the expenses
+    :type df: dataframe
+    :param from_date: first date of the period
+    :type from_date: datetime
+    :param headless: Whether to start Chrome without a window
+    :type headless: bool
+    :return: None
+    """
+    browser_sogeti = declaratie.start_browser(headless=headless, profile_dir=entry['profile_dir'])
+    try:
+        browser_sogeti.get(declaratie.EINSTEIN_URL)
+        declaratie.check_sogeti_element(browser_sogeti, interactive=False)
+        try:
+            declaratie.fill_in_basics_sogeti(browser_sogeti, from_date, entry['amount'])
+            declaratie.loop_through_df(df, browser_sogeti, confirm=False)
+        except Exception as error:
+            raise SubmissionStarted(f'{type(error).__name__}: {error}') from error
+    finally:
+        browser_sogeti.quit()
+
+
+def run_entry(entry, retries=DEFAULT_RETRIES, headless=True):
+    """
+    Checks and submits one manifest entry, retrying the browser part up to retries times as long as the
+    declaration has not been started.
+
+    :param entry: The manifest entry
+    :type entry: dict
+    :param retries: The number of extra attempts after a failed submission
+    :type retries: int
+    :param headless: Whether to start Chrome without a window
+    :type headless: bool
+    :return: The result with keys user, period, rows, status, attempts, seconds and error
+    :rtype: dict
+    """
+    start = time.perf_counter()
+    from_date, until_date = define_period(entry['year'], entry['month'])
+    result = {'user': entry['user'], 'period': from_date.strftime('%Y-%m'), 'rows': 0,
+              'status': 'failed', 'attempts': 0, 'seconds': 0.0, 'error': ''}
+
+    try:
+        df = load_expenses(entry['export'])
+        result['rows'] = len(df)
+        calc_cents = int(df[PRICE_CENTS_COLUMN].sum())
+    except (OSError, ValueError, KeyError) as error:
+        result['error'] = f'Could not read {entry["export"]}: {error}'
+    else:
+        input_cents = amount_to_cents(entry['amount'])
+        if calc_cents != input_cents:
+            result['status'] = 'amount mismatch'
+            result['error'] = f'Input amount {format_cents(input_cents)}, calculated amount {format_cents(calc_cents)}'
+
+        while result['status'] == 'failed' and result['attempts'] <= retries:
+            result['attempts'] += 1
+            try:
+                submit_entry(entry, df, from_date, headless)
+                result['status'] = 'submitted'
+                result['error'] = ''
+            except SubmissionStarted as error:  # The declaration may exist already, don't submit it again
+                result['status'] = 'incomplete'
+                result['error'] = f'{error}; check the declaration on Einstein before submitting it again'
+            except Exception as error:  # Any WebDriver failure before the start is worth another attempt
+                result['error'] = f'{type(error).__name__}: {error}'
+
+    result['seconds'] = round(time.perf_counter() - start, 2)
+
+    return result
+
+
+def print_report(results):
+    """
+    Prints a table with the result of every manifest entry.
+
+    :param results: The results of run_entry
+    :type results: list
+    :return: None
+    """
+    print("---------------------------------------------------------------")
+    print(f"{'user':<20} {'period':<8} {'rows':>6} {'status':<16} {'attempts':>8} {'seconds':>8}  error")
+    for result in results:
+        print(f"{result['user']:<20} {result['period']:<8} {result['rows']:>6} {result['status']:<16} "
+              f"{result['attempts']:>8} {result['seconds']:>8}  {result['error']}")
+    submitted = sum(result['status'] == 'submitted' for result in results)
+    print(f"Submitted {submitted} of {len(results)} declarations")
+
+
+def run_team(manifest_path, workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES, report_path=None, headless=True):
+    """
+    Submits every manifest entry on a pool of at most workers browsers and reports the results.
+
+    :param manifest_path: The path of the manifest CSV
+    :type manifest_path: str
+    :param workers: The maximum number of browsers running at the same time
+    :type workers: int
+    :param retries: The number of extra attempts after a failed submission
+    :type retries: int
+    :param report_path: The path to write the results to as JSON, if given
+    :type report_path: str
+    :param headless: Whether to start Chrome without a window
+    :type headless: bool
+    :return: The results in manifest order
+    :rtype: list
+    """
+    entries = read_manifest(manifest_path)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda entry: run_entry(entry, retries, headless), entries))
+
+    print_report(results)
+    if report_path:
+        with open(report_path, 'w') as report_file:
+            json.dump(results, report_file, indent=2)
+
+    return results
+
+
+def main():
+    """This is the main function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('manifest', help='CSV with the columns user, export, year, month, amount[, profile_dir]')
+    parser.add_argument('--workers', type=positive_int, default=DEFAULT_WORKERS,
+                        help='maximum number of browsers at once')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='extra attempts per declaration')
+    parser.add_argument('--report', help='write the results to this JSON file')
+    parser.add_argument('--show-browser', action='store_true', help='run Chrome with a window')
+    args = parser.parse_args()
+
+    run_team(args.manifest, args.workers, args.retries, args.report, headless=not args.show_browser)
+
+
+if __name__ == '__main__':
+    main()
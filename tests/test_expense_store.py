@@ -0,0 +1,57 @@
+import os
+import sys
+import pandas as pd
+import expense_store
+from expense_report import load_expenses
+from reconciliation import PRICE_CENTS_COLUMN
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from synthetic_export import KAARTNUMMER, write_export  # noqa: E402
+
+CARD = '3528010488672904'
+
+
+def report(rows):
+    return pd.DataFrame({'Datum': pd.to_datetime([datum for datum, _, _ in rows]),
+                         'Omschrijving': pd.Categorical([omschrijving for _, omschrijving, _ in rows]),
+                         PRICE_CENTS_COLUMN: [cents for _, _, cents in rows]})
+
+
+JANUARY = [('2024-01-01', 'Bus halte A naar halte B', 250), ('2024-01-02', 'Bus halte A naar halte B', 250),
+           ('2024-01-31', 'Check-in/Check-uit: Utrecht - Amsterdam', 830)]
+AROUND_JANUARY = [('2023-12-31', 'Check-in/Check-uit: Amsterdam - Utrecht', 830),
+                  ('2024-01-31', 'Check-in/Check-uit: Utrecht - Amsterdam', 830),
+                  ('2024-02-01', 'Bus halte B naar halte A', 250)]
+
+
+def test_ingesting_an_overlapping_export_twice_adds_nothing(tmp_path):
+    connection = expense_store.connect(str(tmp_path / 'expenses.sqlite'))
+
+    assert expense_store.ingest(connection, report(JANUARY), CARD) == 3
+    assert expense_store.ingest(connection, report(AROUND_JANUARY), CARD) == 2
+    assert expense_store.ingest(connection, report(AROUND_JANUARY), CARD) == 0
+    assert expense_store.ingest(connection, report(JANUARY), CARD) == 0
+
+
+def test_month_totals_cover_the_first_and_last_day(tmp_path):
+    connection = expense_store.connect(str(tmp_path / 'expenses.sqlite'))
+    expense_store.ingest(connection, report(JANUARY), CARD)
+    expense_store.ingest(connection, report(AROUND_JANUARY), CARD)
+
+    assert expense_store.month_totals(connection) == [('2023-12', CARD, 830, 1), ('2024-01', CARD, 1330, 3),
+                                                      ('2024-02', CARD, 250, 1)]
+    assert expense_store.month_totals(connection, 2024) == [('2024-01', CARD, 1330, 3), ('2024-02', CARD, 250, 1)]
+
+
+def test_load_month_matches_load_expenses(tmp_path, monkeypatch):
+    monkeypatch.setattr('export_cache.CACHE_AVAILABLE', False)
+    export_path = str(tmp_path / 'reistransacties-export.xlsx')
+    write_export(export_path, 200, 2020, 3)
+    df = load_expenses(export_path)
+    connection = expense_store.connect(str(tmp_path / 'expenses.sqlite'))
+    expense_store.ingest(connection, df, KAARTNUMMER)
+    month = expense_store.load_month(connection, 2020, 3)
+
+    assert len(month) == len(df)
+    assert month[PRICE_CENTS_COLUMN].sum() == df[PRICE_CENTS_COLUMN].sum()
+    assert expense_store.month_totals(connection) == [('2020-03', KAARTNUMMER, df[PRICE_CENTS_COLUMN].sum(), len(df))]
@@ -0,0 +1,58 @@
+import pandas as pd
+from export_merge import export_card, merge_exports
+from reconciliation import CARD_COLUMN, PRICE_CENTS_COLUMN
+
+
+def report(rows, card=None):
+    df = pd.DataFrame({'Datum': pd.to_datetime([datum for datum, _, _ in rows]),
+                       'Omschrijving': pd.Categorical([omschrijving for _, omschrijving, _ in rows]),
+                       PRICE_CENTS_COLUMN: [cents for _, _, cents in rows]})
+    if card is not None:
+        df[CARD_COLUMN] = pd.Categorical([card] * len(rows))
+    return df
+
+
+def merged(reports):
+    return merge_exports(list(reports), reports.get)
+
+
+JANUARY = [('2024-01-02', 'Bus halte A naar halte B', 250), ('2024-01-02', 'Bus halte A naar halte B', 250),
+           ('2024-01-05', 'Check-in/Check-uit: Utrecht - Amsterdam', 830)]
+OVERLAP = [('2024-01-05', 'Check-in/Check-uit: Utrecht - Amsterdam', 830),
+           ('2024-01-09', 'Check-in/Check-uit: Amsterdam - Utrecht', 830)]
+
+
+def test_export_card():
+    assert export_card('/downloads/reistransacties-3528010488672904 (16).xls') == '3528010488672904'
+    assert export_card('january.xls') == ''
+
+
+def test_identical_rides_of_a_day_are_kept():
+    assert len(merged({'reistransacties-1.xls': report(JANUARY)})) == 3
+
+
+def test_overlapping_reports_add_nothing_twice():
+    df = merged({'reistransacties-1.xls': report(JANUARY), 'reistransacties-1 (2).xls': report(OVERLAP)})
+    assert len(df) == 4
+    assert df[PRICE_CENTS_COLUMN].sum() == 250 + 250 + 830 + 830
+    assert df['Datum'].is_monotonic_increasing
+
+
+def test_same_report_twice():
+    assert len(merged({'a.xls': report(JANUARY, '1111'), 'b.xls': report(JANUARY, '1111')})) == 3
+
+
+def test_cards_from_the_kaartnummer_column():
+    "Renamed files have no card in their name, the column tells the cards apart"
+    df = merged({'a.xls': report(JANUARY, '1111'), 'b.xls': report(JANUARY, '2222')})
+    assert len(df) == 6
+    assert sorted(df[CARD_COLUMN].unique()) == ['1111', '2222']
+
+
+def test_card_from_the_file_name_without_the_column():
+    df = merged({'reistransacties-1111.xls': report(JANUARY), 'reistransacties-2222.xls': report(JANUARY)})
+    assert len(df) == 6
+
+
+def test_empty_report():
+    assert merged({'a.xls': report([])}).empty
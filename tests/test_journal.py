@@ -0,0 +1,90 @@
+import datetime
+import pytest
+from journal import chunk_journals, confirm_rows, finish_declaration, first_unconfirmed, journal_path, read_journal, \
+    start_declaration
+from submission_plan import FormRow
+
+PLAN = tuple(FormRow(f'{position}_2', '01-01-2024', position + 1, '3.5', 'Utrecht', 'Amsterdam')
+             for position in range(30))
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return str(tmp_path / 'journal' / '2024-01.jsonl')
+
+
+def test_resumes_after_confirmed_rows(journal):
+    start_declaration(journal, 'January 2024')
+    confirm_rows(journal, PLAN, range(25))
+    state = read_journal(journal)
+    assert state['reference'] == 'January 2024'
+    assert not state['done']
+    assert first_unconfirmed(state, PLAN) == 25
+
+
+def test_nothing_confirmed(journal):
+    start_declaration(journal, 'January 2024')
+    assert first_unconfirmed(read_journal(journal), PLAN) == 0
+
+
+def test_done(journal):
+    start_declaration(journal, 'January 2024')
+    confirm_rows(journal, PLAN, range(len(PLAN)))
+    finish_declaration(journal)
+    state = read_journal(journal)
+    assert state['done']
+    assert first_unconfirmed(state, PLAN) == len(PLAN)
+
+
+def test_only_the_last_declaration_counts(journal):
+    start_declaration(journal, 'old')
+    confirm_rows(journal, PLAN, range(25))
+    start_declaration(journal, 'new')
+    confirm_rows(journal, PLAN, range(3))
+    state = read_journal(journal)
+    assert state['reference'] == 'new'
+    assert first_unconfirmed(state, PLAN) == 3
+
+
+def test_torn_line_is_skipped_and_appends_start_on_a_new_line(journal):
+    start_declaration(journal, 'old')
+    confirm_rows(journal, PLAN, range(25))
+    with open(journal, 'a') as journal_file:
+        journal_file.write('{"type": "row", "ind')
+    start_declaration(journal, 'new')
+    confirm_rows(journal, PLAN, range(3))
+    state = read_journal(journal)
+    assert state['reference'] == 'new'
+    assert first_unconfirmed(state, PLAN) == 3
+
+
+def test_changed_row_is_refused(journal):
+    start_declaration(journal, 'January 2024')
+    confirm_rows(journal, PLAN, range(5))
+    changed = PLAN[:2] + (PLAN[2]._replace(ov_bedrag='4.0'),) + PLAN[3:]
+    with pytest.raises(ValueError):
+        first_unconfirmed(read_journal(journal), changed)
+
+
+def test_shorter_plan_is_refused(journal):
+    start_declaration(journal, 'January 2024')
+    confirm_rows(journal, PLAN, range(5))
+    with pytest.raises(ValueError):
+        first_unconfirmed(read_journal(journal), PLAN[:3])
+
+
+def test_journal_without_declaration(journal):
+    confirm_rows(journal, PLAN, range(2))
+    with pytest.raises(ValueError):
+        read_journal(journal)
+
+
+def test_chunk_journals(tmp_path):
+    from_date = datetime.datetime(2024, 1, 1)
+    journal_dir = str(tmp_path)
+    assert chunk_journals(from_date, journal_dir) == []
+    for chunk in (None, 1, 2):
+        start_declaration(journal_path(from_date, chunk, journal_dir), 'January 2024')
+    start_declaration(journal_path(datetime.datetime(2024, 2, 1), 1, journal_dir), 'February 2024')
+    assert chunk_journals(from_date, journal_dir) == [journal_path(from_date, 1, journal_dir),
+                                                      journal_path(from_date, 2, journal_dir)]
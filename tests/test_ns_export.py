@@ -0,0 +1,52 @@
+import datetime
+import os
+import pytest
+from standin_server import NS_SESSION_COOKIE, StandInServer
+
+requests = pytest.importorskip('requests')
+import ns_export  # noqa: E402
+
+PERIODS = [(datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 31)),
+           (datetime.datetime(2020, 2, 1), datetime.datetime(2020, 2, 29))]
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    export_path = tmp_path / 'export.xls'
+    export_path.write_bytes(b'stand-in export')
+    server = StandInServer(export_path=str(export_path)).start()
+    monkeypatch.setattr(ns_export, 'NS_EXPORT_URL', server.ns_export_url)
+    yield server
+    server.stop()
+
+
+def logged_in_session(server):
+    session = requests.Session()
+    session.get(server.ns_login_url).raise_for_status()
+    assert NS_SESSION_COOKIE in session.cookies
+
+    return session
+
+
+def test_fetch_exports_saves_every_period(server, tmp_path):
+    directory = tmp_path / 'downloads'
+    directory.mkdir()
+    paths = ns_export.fetch_exports(logged_in_session(server), PERIODS, str(directory), workers=2)
+
+    assert [os.path.basename(path) for path in paths] == ['reistransacties-export-20200101-20200131.xls',
+                                                          'reistransacties-export-20200201-20200229.xls']
+    assert sorted(os.listdir(directory)) == sorted(os.path.basename(path) for path in paths)
+    assert sorted(server.export_periods) == PERIODS
+
+
+def test_fetch_export_without_cookie_fails(server, tmp_path):
+    with pytest.raises(requests.HTTPError):
+        ns_export.fetch_export(requests.Session(), *PERIODS[0], str(tmp_path))
+    assert server.export_periods == []
+
+
+def test_export_without_period_fails(server):
+    response = logged_in_session(server).get(server.ns_export_url)
+
+    assert response.status_code == 400
+    assert server.export_periods == []
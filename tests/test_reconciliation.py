@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+from reconciliation import amount_to_cents, find_candidates
+
+
+def prices(*cents):
+    return pd.Series(cents, index=[f'row{position}' for position in range(len(cents))])
+
+
+def test_single_row():
+    assert find_candidates(prices(120, 350, 90), 350) == ['row1']
+
+
+def test_pair():
+    assert find_candidates(prices(120, 350, 90), 210) == ['row0', 'row2']
+
+
+def test_pair_of_equal_prices():
+    assert find_candidates(prices(75, 200, 75), 150) == ['row0', 'row2']
+
+
+def test_single_row_is_preferred_over_pair():
+    assert find_candidates(prices(100, 200, 300), 300) == ['row2']
+
+
+def test_triple():
+    assert sorted(find_candidates(prices(100, 200, 400, 1000), 700)) == ['row0', 'row1', 'row2']
+
+
+def test_triple_skipped_for_large_reports():
+    assert find_candidates(prices(100, 200, 400, 1000), 700, max_rows_for_triples=3) == []
+
+
+def test_no_candidates():
+    assert find_candidates(prices(100, 200), 1) == []
+
+
+def test_labels_of_filtered_dataframe():
+    cents = pd.Series([100, 250, 40], index=[7, 3, 12])
+    assert find_candidates(cents, 290) == [3, 12]
+
+
+@pytest.mark.parametrize('amount, cents', [(0.1 + 0.2, 30), (19.99, 1999), (-0.05, -5), (1234.56, 123456)])
+def test_amount_to_cents(amount, cents):
+    assert amount_to_cents(amount) == cents
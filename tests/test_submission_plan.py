@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+from submission_plan import chunk_bounds
+
+
+def datum(*days):
+    return pd.Series(pd.to_datetime([f'2024-01-{day:02d}' for day in days]))
+
+
+def test_fits_in_one_chunk():
+    assert chunk_bounds(datum(1, 1, 2), 3) == [0, 3]
+
+
+def test_splits_at_the_start_of_a_day():
+    assert chunk_bounds(datum(1, 1, 2, 2, 2, 3, 3), 4) == [0, 2, 5, 7]
+
+
+def test_splits_a_day_that_is_too_long():
+    assert chunk_bounds(datum(1, 1, 1, 1, 1, 2), 2) == [0, 2, 4, 6]
+
+
+def test_chunks_are_never_longer_than_max_rows():
+    days = [1] * 3 + [2] * 7 + [3] + [4] * 4 + [5] * 2
+    bounds = chunk_bounds(datum(*days), 5)
+    assert bounds[0] == 0 and bounds[-1] == len(days)
+    assert all(0 < end - start <= 5 for start, end in zip(bounds, bounds[1:]))
+
+
+def test_empty():
+    assert chunk_bounds(datum(), 5) == [0, 0]
+
+
+@pytest.mark.parametrize('max_rows', [0, -1])
+def test_rejects_max_rows_below_one(max_rows):
+    with pytest.raises(ValueError):
+        chunk_bounds(datum(1, 2), max_rows)
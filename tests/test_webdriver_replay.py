@@ -0,0 +1,49 @@
+import datetime
+import os
+import sys
+import pytest
+from expense_report import calculate_amount, compact_export, filter_out_zero
+from reconciliation import PRICE_CENTS_COLUMN
+from webdriver_replay import ReplayMismatch, load_recording, replay_driver
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from synthetic_export import generate_export_df  # noqa: E402
+
+"fill_in_basics_sogeti and a bulk loop_through_df of ROWS rows, see benchmarks/bench_replay.py"
+RECORDING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'replay_submission.json')
+ROWS = 5
+
+
+@pytest.fixture
+def expenses():
+    "The rows bench_replay --rows 5 records, see bench_submission.generate_expenses"
+    return filter_out_zero(compact_export(generate_export_df(2 * ROWS + 10))).head(ROWS)
+
+
+def submit(driver, df):
+    import declaratie_sogeti_2 as declaratie
+
+    declaratie.fill_in_basics_sogeti(driver, datetime.datetime(2020, 1, 1), calculate_amount(df))
+    declaratie.loop_through_df(df, driver, bulk=True, confirm=False)
+
+
+def test_replays_the_recorded_commands(expenses):
+    driver, executor = replay_driver(load_recording(RECORDING_PATH))
+    submit(driver, expenses)
+    executor.assert_finished()
+
+
+def test_changed_command_raises(expenses):
+    expenses.loc[expenses.index[2], PRICE_CENTS_COLUMN] += 1
+    driver, executor = replay_driver(load_recording(RECORDING_PATH))
+    with pytest.raises(ReplayMismatch):
+        submit(driver, expenses)
+
+
+def test_missing_commands_raise(expenses):
+    import declaratie_sogeti_2 as declaratie
+
+    driver, executor = replay_driver(load_recording(RECORDING_PATH))
+    declaratie.fill_in_basics_sogeti(driver, datetime.datetime(2020, 1, 1), calculate_amount(expenses))
+    with pytest.raises(ReplayMismatch):
+        executor.assert_finished()
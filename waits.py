@@ -0,0 +1,131 @@
+"""Explicit, timeout-bounded readiness conditions for the NS and Einstein pages,
+so the program continues as soon as a page is ready instead of when the user
+presses a key.
+
+Every kind of wait has its own (timeout, polling interval) in seconds in
+WAIT_SETTINGS. They can be overridden per kind with environment variables, e.g.
+EXPENSE_WAIT_LOGIN=600 or EXPENSE_WAIT_ELEMENT=20,0.1"""
+import os
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
+from download_watcher import wait_for_export
+from einstein_form import ROW_DATUM_SELECTOR
+
+WAIT_SETTINGS = {
+    'login': (300, 1.0),  # The user logs in by hand
+    'element': (30, 0.2),
+    'iframe': (30, 0.2),
+    'rows': (10, 0.1),
+    'download': (300, 0.5),
+}
+WAIT_ENV_PREFIX = 'EXPENSE_WAIT_'
+
+
+def wait_settings(kind):
+    """
+    Returns the timeout and polling interval of a kind of wait.
+
+    :param kind: The kind of wait, a key of WAIT_SETTINGS
+    :type kind: str
+    :return: tuple (timeout, poll_interval)
+    :rtype: tuple
+    """
+    timeout, poll_interval = WAIT_SETTINGS[kind]
+    override = os.environ.get(WAIT_ENV_PREFIX + kind.upper())
+    if override:
+        values = override.split(',')
+        timeout = float(values[0])
+        if len(values) > 1:
+            poll_interval = float(values[1])
+
+    return timeout, poll_interval
+
+
+def wait_until(browser, condition, kind='element'):
+    """
+    Waits until condition returns a truthy value and returns that value.
+
+    :param browser: The browser to wait on
+    :type browser: WebDriver
+    :param condition: Function that takes the browser
+    :type condition: callable
+    :param kind: The kind of wait, a key of WAIT_SETTINGS
+    :type kind: str
+    :return: The value of condition
+    """
+    timeout, poll_interval = wait_settings(kind)
+
+    return WebDriverWait(browser, timeout, poll_frequency=poll_interval).until(condition)
+
+
+def wait_for_element(browser, by, locator, clickable=False, kind='element'):
+    """
+    Waits until an element is present, or visible and enabled when clickable, and returns it.
+
+    :param browser: The browser to wait on
+    :type browser: WebDriver
+    :param by: The locator strategy, a By value
+    :type by: str
+    :param locator: The locator of the element
+    :type locator: str
+    :param clickable: Whether to wait until the element can be clicked
+    :type clickable: bool
+    :param kind: The kind of wait, a key of WAIT_SETTINGS
+    :type kind: str
+    :return: The element
+    :rtype: WebElement
+    """
+    if clickable:
+        condition = expected_conditions.element_to_be_clickable((by, locator))
+    else:
+        condition = expected_conditions.presence_of_element_located((by, locator))
+
+    return wait_until(browser, condition, kind)
+
+
+def wait_for_iframe(browser, xpath):
+    """
+    Waits until the iframe at xpath is loaded and switches to it.
+
+    :param browser: The browser to wait on
+    :type browser: WebDriver
+    :param xpath: The xpath of the iframe
+    :type xpath: str
+    :return: None
+    """
+    wait_until(browser, expected_conditions.frame_to_be_available_and_switch_to_it((By.XPATH, xpath)), 'iframe')
+
+
+def wait_for_row_count(browser, count):
+    """
+    Waits until the expense form has at least count rows.
+
+    :param browser: The browser to wait on, switched to the iframe of the expense form
+    :type browser: WebDriver
+    :param count: The number of rows
+    :type count: int
+    :return: The number of rows
+    :rtype: int
+    """
+    def enough_rows(driver):
+        row_count = len(driver.find_elements(By.CSS_SELECTOR, ROW_DATUM_SELECTOR))
+        return row_count if row_count >= count else False
+
+    return wait_until(browser, enough_rows, 'rows')
+
+
+def wait_for_download(directory, started):
+    """
+    Waits until the NS export started after started has finished downloading and returns its path.
+
+    :param directory: The directory the browser downloads to
+    :type directory: str
+    :param started: The time.time() value from before the download was started
+    :type started: float
+    :return: The path of the downloaded excel file
+    :rtype: str
+    """
+    timeout, poll_interval = wait_settings('download')
+
+    return wait_for_export(directory, started, timeout, poll_interval)
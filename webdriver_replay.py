@@ -0,0 +1,219 @@
+"""Records the WebDriver command stream of a real run and replays it without a
+browser.
+
+start_recording wraps the command_executor of a running browser, so every
+command (locators, keystrokes, clicks, frame switches, scripts) is captured with
+the response the browser sent. replay_driver returns a WebDriver whose
+command_executor answers from such a recording instead of the network, and
+checks that the code under test sends exactly the recorded commands in the
+recorded order. fill_in_basics_sogeti and loop_through_df then run in
+milliseconds per row, and an optimisation that changes the command stream shows
+up as a ReplayMismatch.
+
+A wait that timed out during the recording polls a different number of times on
+replay, so record runs in which every wait succeeds. Set small polling
+intervals for the replay, e.g. EXPENSE_WAIT_ELEMENT=30,0.001, so the waits that
+polled more than once during the recording do not sleep."""
+import collections
+import copy
+import json
+
+REPLAY_SESSION_ID = 'replay'
+
+
+class ReplayMismatch(AssertionError):
+    """The code under test sent another command than the recording has at that position"""
+
+
+def without_session(params):
+    """
+    Returns the parameters of a command without the session id, which differs between runs.
+
+    :param params: The parameters of the command
+    :type params: dict
+    :return: The parameters without 'sessionId'
+    :rtype: dict
+    """
+    return {name: value for name, value in (params or {}).items() if name != 'sessionId'}
+
+
+class RecordingExecutor:
+    """
+    Wraps the command_executor of a browser and records every command and its response. Other attributes are
+    passed on to the wrapped executor.
+
+    :param executor: The command_executor of the browser
+    :type executor: RemoteConnection
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.commands = []
+
+    def __getattr__(self, name):
+        return getattr(self.executor, name)
+
+    def execute(self, command, params):
+        """
+        Sends the command to the browser and records it.
+
+        :param command: The name of the command
+        :type command: str
+        :param params: The parameters of the command
+        :type params: dict
+        :return: The response of the browser
+        :rtype: dict
+        """
+        response = self.executor.execute(command, params)
+        "A copy, as WebDriver replaces the element references in the response by WebElement objects"
+        self.commands.append({'command': command, 'params': without_session(params),
+                              'response': copy.deepcopy(response)})
+
+        return response
+
+
+def start_recording(browser):
+    """
+    Starts recording the commands of a running browser.
+
+    :param browser: The browser
+    :type browser: WebDriver
+    :return: The recording executor, pass it to save_recording when done
+    :rtype: RecordingExecutor
+    """
+    recorder = RecordingExecutor(browser.command_executor)
+    browser.command_executor = recorder
+
+    return recorder
+
+
+def save_recording(browser, recorder, recording_path):
+    """
+    Writes the recorded commands to a JSON file and stops recording.
+
+    :param browser: The recorded browser
+    :type browser: WebDriver
+    :param recorder: The result of start_recording
+    :type recorder: RecordingExecutor
+    :param recording_path: The path of the JSON file
+    :type recording_path: str
+    :return: The recording
+    :rtype: dict
+    """
+    browser.command_executor = recorder.executor
+    recording = {'w3c': browser.w3c, 'capabilities': browser.capabilities, 'commands': recorder.commands}
+    with open(recording_path, 'w') as recording_file:
+        json.dump(recording, recording_file)
+
+    return recording
+
+
+def load_recording(recording_path):
+    """
+    Reads in a recording.
+
+    :param recording_path: The path of the JSON file
+    :type recording_path: str
+    :return: The recording
+    :rtype: dict
+    """
+    with open(recording_path) as recording_file:
+        return json.load(recording_file)
+
+
+def command_counts(commands):
+    """
+    Returns the number of commands per command name.
+
+    :param commands: The 'commands' of a recording
+    :type commands: list
+    :return: The counts
+    :rtype: Counter
+    """
+    return collections.Counter(entry['command'] for entry in commands)
+
+
+class ReplayExecutor:
+    """
+    A command_executor that answers every command with the next response of a recording.
+
+    :param recording: The recording
+    :type recording: dict
+    :param check_params: Whether the parameters must match too, not only the command names
+    :type check_params: bool
+    """
+
+    def __init__(self, recording, check_params=True):
+        self.recording = recording
+        self.check_params = check_params
+        self.position = 0
+        self.w3c = recording['w3c']
+
+    def new_session(self):
+        """
+        Returns the response to the newSession command of WebDriver's constructor, which is not in the recording.
+
+        :return: The response
+        :rtype: dict
+        """
+        if self.w3c:
+            return {'value': {'sessionId': REPLAY_SESSION_ID, 'capabilities': self.recording['capabilities']}}
+
+        return {'status': 0, 'sessionId': REPLAY_SESSION_ID, 'value': self.recording['capabilities']}
+
+    def execute(self, command, params):
+        """
+        Checks the command against the recording and returns the recorded response.
+
+        :param command: The name of the command
+        :type command: str
+        :param params: The parameters of the command
+        :type params: dict
+        :return: The recorded response
+        :rtype: dict
+        """
+        if command == 'newSession':
+            return self.new_session()
+
+        commands = self.recording['commands']
+        if self.position >= len(commands):
+            raise ReplayMismatch(f"Command {self.position} ({command}) comes after the end of the recording")
+        entry = commands[self.position]
+        if entry['command'] != command:
+            raise ReplayMismatch(f"Command {self.position} is {command}, the recording has {entry['command']}")
+        if self.check_params and entry['params'] != without_session(params):
+            raise ReplayMismatch(f"Command {self.position} ({command}) has parameters {without_session(params)}, "
+                                 f"the recording has {entry['params']}")
+        self.position += 1
+
+        return copy.deepcopy(entry['response'])
+
+    def assert_finished(self):
+        """
+        Checks that every recorded command has been replayed.
+
+        :return: None
+        """
+        remaining = len(self.recording['commands']) - self.position
+        if remaining:
+            raise ReplayMismatch(f"{remaining} recorded commands were not sent, the first is "
+                                 f"{self.recording['commands'][self.position]['command']}")
+
+
+def replay_driver(recording, check_params=True):
+    """
+    Returns a WebDriver that replays a recording, and its executor.
+
+    :param recording: The recording
+    :type recording: dict
+    :param check_params: Whether the parameters must match too, not only the command names
+    :type check_params: bool
+    :return: tuple (driver, executor), call executor.assert_finished() after the run
+    :rtype: tuple
+    """
+    from selenium.webdriver.remote.webdriver import WebDriver
+
+    executor = ReplayExecutor(recording, check_params)
+    driver = WebDriver(command_executor=executor, desired_capabilities=dict(recording['capabilities'] or {}))
+
+    return driver, executor